@@ -0,0 +1,16 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``, for servers such as uvicorn. Requests are resolved with
+app.async_urls, which serves the recipe endpoints from their async
+variants.
+"""
+
+import os
+
+from core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+application = get_asgi_application(urlconf='app.async_urls')
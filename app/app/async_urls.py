@@ -0,0 +1,9 @@
+"""URLconf of the ASGI application: app.urls with async recipe views."""
+from django.urls import path, include
+
+from app.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/recipe/', include('recipe.async_urls')),
+    *sync_urlpatterns,
+]
@@ -0,0 +1,78 @@
+"""Gunicorn settings for production.
+
+Serve the WSGI app with threaded workers:
+
+    gunicorn -c python:app.gunicorn_conf app.wsgi
+
+or the ASGI app with uvicorn workers:
+
+    gunicorn -c python:app.gunicorn_conf \
+        -k uvicorn.workers.UvicornWorker app.asgi
+
+Each setting below can be changed through the environment variable next
+to it.
+"""
+import glob
+import os
+import tempfile
+
+
+def cpu_count():
+    """Return the number of cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# Requests mostly wait on Postgres, so a couple of workers per core keep
+# the cores busy. WEB_CONCURRENCY is gunicorn's own variable for this.
+workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import Django once in the master, so workers share its memory pages
+# copy-on-write instead of each loading its own copy.
+preload_app = True
+
+# Replace each worker after this many requests, give or take the jitter so
+# they don't all restart at once, to bound the damage of slow leaks.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER',
+                                         max_requests // 10))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# An empty GUNICORN_ACCESS_LOG turns the access log off.
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+
+# Heartbeat files on tmpfs, so a slow disk can't get workers killed.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Workers keep their Prometheus metrics in memory-mapped files here, which
+# /metrics adds up. Their files are removed on start so restarts begin
+# from zero; the directory itself may be a mounted volume and is kept.
+prometheus_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(worker_tmp_dir if os.path.isdir('/dev/shm')
+                 else tempfile.gettempdir(), 'prometheus'),
+)
+os.makedirs(prometheus_dir, exist_ok=True)
+for path in glob.glob(os.path.join(prometheus_dir, '*.db')):
+    os.remove(path)
+
+
+def pre_fork(server, worker):
+    """Don't let workers inherit database connections of the master."""
+    from django.db import connections
+    connections.close_all()
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -11,11 +11,17 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 """
 
 import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
+TESTING = sys.argv[1:2] == ['test']
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 
@@ -45,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PrometheusMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,14 +86,197 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+# Set DB_POOL=1 to share connections between the threads of a process
+# through an in-process pool. Connections then go back to the pool when a
+# request finishes, so CONN_MAX_AGE defaults to 0; without the pool each
+# thread keeps its own connection open for DB_CONN_MAX_AGE seconds.
+DB_POOL = os.environ.get('DB_POOL', '') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE',
+                                           0 if DB_POOL else 60)),
+        'CONN_HEALTH_CHECKS':
+            os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'IDLE_TIMEOUT': int(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        } if DB_POOL else None,
+    }
+}
+
+# Comma-separated hosts of read replicas of the default database. Each
+# becomes a "replicaN" alias that safe API requests read from.
+DB_REPLICA_HOSTS = [host for host in
+                    os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host]
+
+for number, host in enumerate(DB_REPLICA_HOSTS, 1):
+    DATABASES[f'replica{number}'] = dict(
+        DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# After a write, a user reads from the primary for PIN_SECONDS, which must
+# exceed the replication lag. Pins are kept in the cache, which must be
+# shared (REDIS_URL) so that every process sees them.
+if DB_REPLICA_HOSTS and not os.environ.get('REDIS_URL'):
+    raise ImproperlyConfigured(
+        'DB_REPLICA_HOSTS needs REDIS_URL: without a shared cache, users '
+        'may read from a lagging replica right after writing.'
+    )
+
+DATABASE_ROUTING = {
+    'REPLICAS': [f'replica{number}'
+                 for number in range(1, len(DB_REPLICA_HOSTS) + 1)],
+    'PIN_SECONDS': int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10)),
+    'CACHE_ALIAS': 'default',
+}
+
+
+# Connections each process may hold to the default database at once: the
+# pool's size, or DB_CONNECTIONS_PER_PROCESS without the pool, where every
+# thread holds its own. Workers times this must stay below the server's
+# max_connections (100 by default).
+DB_CONNECTIONS_PER_PROCESS = DATABASES['default']['POOL']['MAX_SIZE'] \
+    if DB_POOL else int(os.environ.get('DB_CONNECTIONS_PER_PROCESS', 10))
+
+# Threads of each ASGI worker process: REQUESTS handle requests, QUERIES
+# run the queries async views issue concurrently. Each may hold a
+# connection at the same time, so together they fit the budget above.
+_asgi_query_threads = min(int(os.environ.get('ASGI_QUERY_THREADS', 10)),
+                          max(1, DB_CONNECTIONS_PER_PROCESS // 2))
+ASGI_THREADS = {
+    'REQUESTS': min(int(os.environ.get('ASGI_REQUEST_THREADS', 20)),
+                    max(1, DB_CONNECTIONS_PER_PROCESS - _asgi_query_threads)),
+    'QUERIES': _asgi_query_threads,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+# Set REDIS_URL to share the cache between processes (needs django-redis).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
+
+# Cached list responses. Users' data versions are only cached when the
+# cache is shared, since writes can only clear them from their own cache.
+RESPONSE_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300)),
+    'VERSION_TIMEOUT': 300 if os.environ.get('REDIS_URL') else 0,
+}
+
+# Cached token authentication. Tokens live in an in-process LRU unless
+# CACHE_ALIAS names one of CACHES, which is then shared by every process.
+# Deleted tokens and changed users are only dropped from the cache of the
+# process that changed them, so the shared cache is used whenever there
+# is one.
+TOKEN_AUTH_CACHE = {
+    'CACHE_ALIAS': os.environ.get(
+        'TOKEN_AUTH_CACHE_ALIAS',
+        'default' if os.environ.get('REDIS_URL') else None,
+    ),
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300)),
+}
+
+# Request throttling. Counters live in an in-process store unless
+# CACHE_ALIAS names one of CACHES, which is then shared by every process.
+# Each process would otherwise allow the full rate, so the shared cache is
+# used whenever there is one.
+THROTTLE_STORE = {
+    'CACHE_ALIAS': os.environ.get(
+        'THROTTLE_CACHE_ALIAS',
+        'default' if os.environ.get('REDIS_URL') else None,
+    ),
+    'MAX_SIZE': int(os.environ.get('THROTTLE_MAX_KEYS', 100000)),
+}
+
+# Requests allowed per scope, as '<count>/<second|minute|hour|day>'. 'auth'
+# counts sign ups and logins per address, 'user' every request per user,
+# 'write' the requests that change data and 'upload' recipe image uploads.
+THROTTLE_RATES = {
+    'auth': os.environ.get('THROTTLE_AUTH_RATE', '10/minute'),
+    'user': os.environ.get('THROTTLE_USER_RATE', '600/minute'),
+    'write': os.environ.get('THROTTLE_WRITE_RATE', '120/minute'),
+    'upload': os.environ.get('THROTTLE_UPLOAD_RATE', '30/hour'),
+}
+
+# Tests and benchmarks send far more requests from one client than that.
+if TESTING or os.environ.get('THROTTLE_ENABLED', '1') != '1':
+    THROTTLE_RATES = dict.fromkeys(THROTTLE_RATES)
+
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserThrottle',
+        'core.throttling.WriteThrottle',
+        'core.throttling.ScopedThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': THROTTLE_RATES,
+    # Proxies in front of the app whose X-Forwarded-For entries are
+    # trusted. With none, clients are told apart by REMOTE_ADDR alone, as
+    # they could otherwise send a new address with each request.
+    'NUM_PROXIES': int(os.environ.get('THROTTLE_NUM_PROXIES', 0)),
+}
+
+# Query counts and timings of a random SAMPLE_RATE share of requests,
+# passed to each of SINKS and sent back in a Server-Timing header.
+REQUEST_METRICS = {
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_METRICS_SAMPLE_RATE', 0.1)),
+    'SERVER_TIMING': os.environ.get('REQUEST_METRICS_SERVER_TIMING',
+                                    '1') == '1',
+    'SINKS': ['core.metrics.LogSink', 'core.metrics.PrometheusSink'],
+}
+
+# Prometheus metrics at /metrics. With TOKEN set, scrapers have to send
+# it in an 'Authorization: Bearer <token>' header.
+METRICS = {
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+# Tests sample the requests they check explicitly.
+if TESTING:
+    REQUEST_METRICS['SAMPLE_RATE'] = 0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'metrics': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.metrics': {
+            'handlers': ['metrics'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -106,6 +297,41 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/2.1/topics/auth/passwords/
+
+# PASSWORD_HASHER picks how new passwords are hashed: 'argon2' (needs
+# argon2-cffi), 'bcrypt' (needs bcrypt) or 'pbkdf2'. The other hashers
+# still check existing passwords, which are rehashed with the chosen one
+# when their user logs in.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+
+PASSWORD_HASHER_CHOICES = {
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'core.hashers.TunedBCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CHOICES[PASSWORD_HASHER],
+    *(hasher for name, hasher in PASSWORD_HASHER_CHOICES.items()
+      if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Costs of the hashers above. The Argon2 defaults are OWASP's minimum
+# (19 MiB, 2 passes), about 40% cheaper than Django 2.1's PBKDF2.
+PASSWORD_HASHING = {
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 19456)),
+    'ARGON2_PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 1)),
+    'BCRYPT_ROUNDS': int(os.environ.get('BCRYPT_ROUNDS', 10)),
+}
+
+# Tests create users by the hundred and don't need strong hashes.
+if TESTING:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.1/topics/i18n/
 
@@ -127,6 +353,40 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 
 STATIC_ROOT = '/vol/web/static'
-MEDIA_ROOT = '/vol/web/media'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', '/vol/web/media')
+
+# How MediaView sends files: '' streams them from Django, while
+# 'x-accel-redirect' (nginx, with an internal location at ACCEL_PREFIX
+# aliasing MEDIA_ROOT) and 'x-sendfile' (Apache, lighttpd) hand them off
+# to the web server once the owner is checked.
+MEDIA_SERVE = {
+    'BACKEND': os.environ.get('MEDIA_SERVE_BACKEND', ''),
+    'ACCEL_PREFIX': os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/'),
+    'MAX_AGE': 365 * 24 * 60 * 60,
+}
+
+# Stored images are shared by content; unreferenced ones are deleted once
+# they're older than GRACE_SECONDS, or by the gc_images command.
+MEDIA_GC = {
+    'GRACE_SECONDS': int(os.environ.get('MEDIA_GC_GRACE_SECONDS', 300)),
+}
+
+# Limits enforced while a recipe image upload streams in.
+IMAGE_UPLOAD = {
+    'MAX_BYTES': int(os.environ.get('IMAGE_UPLOAD_MAX_BYTES', 10 * 2 ** 20)),
+    'MAX_PIXELS': int(os.environ.get('IMAGE_UPLOAD_MAX_PIXELS', 40000000)),
+    'MAX_HEADER_BYTES': 256 * 2 ** 10,
+    'FORMATS': ('JPEG', 'PNG', 'WEBP', 'GIF'),
+}
+
+# Resized copies of uploaded recipe images, rendered in background threads
+# or by the process_images command.
+IMAGE_PIPELINE = {
+    'EAGER': os.environ.get('IMAGE_PIPELINE_EAGER', '') == '1',
+    'WORKERS': int(os.environ.get('IMAGE_PIPELINE_WORKERS', 2)),
+    'WIDTHS': (320, 800, 1600),
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+}
 
 AUTH_USER_MODEL = 'core.User'
@@ -1,10 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
 from django.conf import settings
 
+from core.views import metrics
+from recipe.media import MediaView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>', MediaView.as_view(),
+         name='media'),
+]
@@ -0,0 +1,68 @@
+"""Benchmarks for the recipe API.
+
+Run one as a module from the app directory, with the same environment
+as manage.py:
+
+    python -m benchmarks.bulk --rows 10000
+
+Every benchmark runs against a throwaway test database created next to the
+configured one, so it never touches real data.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    """Configure Django for a standalone benchmark script.
+
+    Throttling is off, as benchmarks load the API from a single client,
+    and so are request metrics unless asked for.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    os.environ.setdefault('THROTTLE_ENABLED', '0')
+    os.environ.setdefault('REQUEST_METRICS_SAMPLE_RATE', '0')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create a test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0,
+                                                  autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def timer(results, name):
+    """Store the wall time of the block in results[name], in seconds."""
+    start = time.perf_counter()
+    yield
+    results[name] = round(time.perf_counter() - start, 4)
+
+
+def authenticated_client(user):
+    """Return an API client that authenticates with a real token."""
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    token, _ = Token.objects.get_or_create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def report(results):
+    """Print the results as JSON."""
+    print(json.dumps(results, indent=2, sort_keys=True))
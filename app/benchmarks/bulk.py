@@ -0,0 +1,61 @@
+"""Compare creating recipes one request at a time with the bulk endpoint."""
+import argparse
+
+from benchmarks import (authenticated_client, report, setup, test_database,
+                        timer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--batch', type=int, default=1000,
+                        help='items per bulk request')
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from core.models import Ingredient, Recipe, Tag
+
+    results = {'rows': args.rows, 'batch': args.batch}
+    with test_database():
+        user = get_user_model().objects.create_user('bench@example.com',
+                                                    'benchpass')
+        client = authenticated_client(user)
+        tags = [Tag.objects.create(user=user, name=f'Tag {index}').id
+                for index in range(5)]
+        ingredients = [
+            Ingredient.objects.create(user=user, name=f'Ingredient {i}').id
+            for i in range(5)
+        ]
+        payload = [{
+            'title': f'Recipe {index}',
+            'time': index % 120,
+            'price': '9.99',
+            'tags': tags[:index % 5 + 1],
+            'ingredients': ingredients[:index % 3 + 1],
+        } for index in range(args.rows)]
+
+        with timer(results, 'serial_seconds'):
+            for item in payload:
+                response = client.post(reverse('recipe:recipe-list'), item,
+                                       format='json')
+                assert response.status_code == 201, response.data
+        Recipe.objects.all().delete()
+
+        with timer(results, 'bulk_seconds'):
+            for start in range(0, args.rows, args.batch):
+                response = client.post(reverse('recipe:recipe-bulk'),
+                                       payload[start:start + args.batch],
+                                       format='json')
+                assert response.status_code == 201, response.data
+        assert Recipe.objects.count() == args.rows
+
+    results['speedup'] = round(
+        results['serial_seconds'] / results['bulk_seconds'], 1
+    )
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Compare the sync and async recipe views under many concurrent clients.
+
+Starts gunicorn with threaded workers on app.wsgi (the sync views) and
+with uvicorn workers on app.asgi (the async variants), then keeps
+--clients keep-alive connections busy against each endpoint from one
+asyncio process, reporting requests/sec and latency percentiles.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import time
+
+from benchmarks import report, setup, test_database
+from benchmarks.servers import SERVERS, free_port, wait_until_up
+
+APPLICATIONS = {
+    'sync': SERVERS['gunicorn_wsgi'],
+    'async': SERVERS['gunicorn_asgi'],
+}
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, return (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('Connection closed by the server.')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, value = line.decode('latin-1').split(':', 1)
+        headers[name.strip().lower()] = value.strip().lower()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    return status, headers.get('connection') != 'close'
+
+
+async def client(port, request, deadline, latencies, errors):
+    """Send request over one connection until deadline."""
+    loop = asyncio.get_event_loop()
+    writer = None
+    while loop.time() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1',
+                                                               port)
+            start = loop.time()
+            writer.write(request)
+            status, keep_alive = await read_response(reader)
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            # Includes the server closing the connection instead of
+            # answering.
+            errors.append(None)
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+            continue
+        latencies.append(loop.time() - start)
+        if status != 200:
+            errors.append(status)
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, path, token, clients, seconds):
+    """Return the requests/sec, latency percentiles and errors of a run."""
+    request = (f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+               f'Authorization: Token {token}\r\n\r\n').encode()
+    loop = asyncio.get_event_loop()
+    latencies, errors = [], []
+    start = loop.time()
+    await asyncio.gather(*(
+        client(port, request, start + seconds, latencies, errors)
+        for _ in range(clients)
+    ))
+    elapsed = loop.time() - start
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(latencies[int(p / 100 * (len(latencies) - 1))] * 1000,
+                     1)
+
+    return {
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(50),
+        'p99_ms': percentile(99),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--workers', type=int,
+                        help='gunicorn workers, defaults to the config')
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+    from core.models import Ingredient, Recipe, Tag
+
+    results = {'clients': args.clients, 'cores': os.cpu_count()}
+    with test_database():
+        user = get_user_model().objects.create_user('bench@example.com',
+                                                    'benchpass')
+        token = Token.objects.create(user=user).key
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag {i}') for i in range(20)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'Ingredient {i}') for i in range(50)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, title=f'Recipe {i}', time=5, price=10)
+            for i in range(args.recipes)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tags[i % len(tags)])
+            for i, recipe in enumerate(recipes)
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            Recipe.ingredients.through(
+                recipe=recipe, ingredient=ingredients[(i + j) % 50]
+            )
+            for i, recipe in enumerate(recipes) for j in range(3)
+        )
+        paths = {
+            'recipe_list': '/api/recipe/recipes/',
+            'recipe_detail': f'/api/recipe/recipes/{recipes[0].pk}/',
+            'tag_list': '/api/recipe/tags/',
+        }
+        env = dict(os.environ, DB_NAME=connection.settings_dict['NAME'],
+                   RESPONSE_CACHE_TIMEOUT='0', GUNICORN_ACCESS_LOG='')
+        if args.workers:
+            env['WEB_CONCURRENCY'] = str(args.workers)
+        connection.close()
+
+        for label, command in APPLICATIONS.items():
+            port = free_port()
+            server = subprocess.Popen(
+                [part.format(bind=f'127.0.0.1:{port}') for part in command],
+                env=env, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+            try:
+                wait_until_up(port)
+                results[label] = {}
+                for endpoint, path in paths.items():
+                    asyncio.get_event_loop().run_until_complete(
+                        load(port, path, token, 10, 1)
+                    )
+                    results[label][endpoint] = \
+                        asyncio.get_event_loop().run_until_complete(
+                            load(port, path, token, args.clients,
+                                 args.seconds)
+                        )
+            finally:
+                os.killpg(server.pid, signal.SIGTERM)
+                server.wait(30)
+                time.sleep(1)
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Time tag and ingredient filters for a user with a large pantry.
+
+Compares the old chained join filters, which return a row per matching
+relation, with the match=any and match=all queries of the recipe list.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks import authenticated_client, report, setup, test_database
+
+
+def seed(user, recipes, pantry, per_recipe, batch=5000):
+    """Bulk insert a pantry of ingredients and recipes drawing from it."""
+    from django.db import connection
+    from core.models import Ingredient, Recipe, Tag
+
+    rng = random.Random(0)
+    ingredients = Ingredient.objects.bulk_create([
+        Ingredient(user=user, name=f'Ingredient {index}')
+        for index in range(pantry)
+    ])
+    tags = Tag.objects.bulk_create([
+        Tag(user=user, name=f'Tag {index}') for index in range(20)
+    ])
+    Contains = Recipe.ingredients.through
+    Tagged = Recipe.tags.through
+    for start in range(0, recipes, batch):
+        created = Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Recipe {start + index}', time=10,
+                   price=5)
+            for index in range(min(batch, recipes - start))
+        ])
+        Contains.objects.bulk_create([
+            Contains(recipe_id=recipe.id, ingredient_id=ingredient.id)
+            for recipe in created
+            for ingredient in rng.sample(ingredients[:per_recipe * 4],
+                                         per_recipe)
+        ])
+        Tagged.objects.bulk_create([
+            Tagged(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in created for tag in rng.sample(tags, 3)
+        ])
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return [obj.id for obj in ingredients[:3]], [obj.id for obj in tags[:2]]
+
+
+def view_queryset(user, params):
+    """Return the recipe list queryset for a request with params."""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from recipe.views import RecipeViewSet
+
+    request = Request(APIRequestFactory().get('/', params))
+    request.user = user
+    view = RecipeViewSet(request=request, action='list', format_kwarg=None,
+                         kwargs={})
+    return view.get_queryset()
+
+
+def median_ms(func, repeat):
+    """Return the median milliseconds func takes."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--pantry', type=int, default=2000,
+                        help='ingredients owned by the user')
+    parser.add_argument('--per-recipe', type=int, default=12,
+                        help='ingredients per recipe')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings
+    from django.urls import reverse
+    from core.models import Recipe
+
+    results = {'recipes': args.recipes, 'pantry': args.pantry}
+    with test_database(), override_settings(
+            RESPONSE_CACHE={'CACHE_ALIAS': 'default', 'TIMEOUT': 0,
+                            'VERSION_TIMEOUT': 0}):
+        user = get_user_model().objects.create_user('bench@example.com',
+                                                    'benchpass')
+        ingredient_ids, tag_ids = seed(user, args.recipes, args.pantry,
+                                       args.per_recipe)
+        client = authenticated_client(user)
+
+        legacy = Recipe.objects.filter(user=user) \
+                               .filter(ingredients__id__in=ingredient_ids) \
+                               .filter(tags__id__in=tag_ids)
+        distinct = legacy.values('id').distinct()
+        results['legacy_rows'] = legacy.count()
+        results['legacy_distinct_recipes'] = distinct.count()
+        results['legacy_ids_ms'] = median_ms(
+            lambda: list(legacy.values_list('id', flat=True)), args.repeat
+        )
+
+        params = {'ingredients': ','.join(map(str, ingredient_ids)),
+                  'tags': ','.join(map(str, tag_ids))}
+        url = reverse('recipe:recipe-list')
+        for match in ('any', 'all'):
+            queryset = view_queryset(user, dict(params, match=match))
+            results[f'{match}_recipes'] = queryset.count()
+            results[f'{match}_ids_ms'] = median_ms(
+                lambda: list(queryset.values_list('id', flat=True)),
+                args.repeat
+            )
+            results[f'{match}_first_page_ms'] = median_ms(
+                lambda: client.get(url, dict(params, match=match)),
+                args.repeat
+            )
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Measure logins per second per core with each password hasher.
+
+Logs a user in through the token endpoint --logins times in this one
+process, for each PASSWORD_HASHER choice at the configured costs, and
+reports how long hashing a password takes on its own.
+"""
+import argparse
+import time
+
+from benchmarks import report, setup, test_database, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=50)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.test.utils import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    payload = {'email': 'bench@example.com', 'password': 'benchpass'}
+    results = {'logins': args.logins}
+    with test_database():
+        for name, hasher in settings.PASSWORD_HASHER_CHOICES.items():
+            with override_settings(PASSWORD_HASHERS=[hasher]):
+                user = get_user_model().objects.create_user(**payload)
+                client = APIClient()
+                start = time.perf_counter()
+                for _ in range(args.logins):
+                    response = client.post(reverse('user:token'), payload)
+                    assert response.status_code == 200, response.data
+                seconds = time.perf_counter() - start
+                timings = {}
+                with timer(timings, 'hash'):
+                    make_password(payload['password'])
+                user.delete()
+            results[name] = {
+                'logins_per_second': round(args.logins / seconds, 1),
+                'hash_ms': round(timings['hash'] * 1000, 1),
+            }
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
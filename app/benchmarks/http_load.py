@@ -0,0 +1,159 @@
+"""Measure requests per second with and without database connection reuse.
+
+Serves the API from a WSGI server with a fixed pool of worker threads, as
+gunicorn's gthread worker does, and fetches recipe details from several
+client threads. Each configuration runs in its own process, configured
+through the same environment variables as the app:
+
+- new_connections: DB_CONN_MAX_AGE=0, a connection per request
+- persistent: DB_CONN_MAX_AGE=60, a connection per worker thread
+- pooled: DB_POOL=1, connections shared by the worker threads
+
+Postgres must accept at least --threads connections.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from benchmarks import report, setup, test_database
+
+CONFIGURATIONS = {
+    'new_connections': {'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60'},
+    'pooled': {'DB_POOL': '1'},
+}
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadPoolWSGIServer(ThreadingMixIn, WSGIServer):
+    """Handle requests on a fixed set of threads instead of one each."""
+    threads = 4
+
+    def process_request(self, request, client_address):
+        if not hasattr(self, 'executor'):
+            self.executor = ThreadPoolExecutor(self.threads)
+        self.executor.submit(self.process_request_thread, request,
+                             client_address)
+
+
+def load(urls, token, clients, seconds):
+    """Fetch urls round robin from client threads, return requests/sec."""
+    deadline = time.perf_counter() + seconds
+    counts = []
+
+    def client(offset):
+        count = 0
+        while time.perf_counter() < deadline:
+            request = urllib.request.Request(
+                urls[(offset + count) % len(urls)],
+                headers={'Authorization': f'Token {token}'},
+            )
+            with urllib.request.urlopen(request) as response:
+                response.read()
+            count += 1
+        counts.append(count)
+
+    threads = [threading.Thread(target=client, args=(offset,))
+               for offset in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def serve(args):
+    """Run one configuration and print its results as JSON."""
+    setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+
+    ThreadPoolWSGIServer.threads = args.threads
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=ThreadPoolWSGIServer,
+                         handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}/api/recipe/recipes'
+    urls = [f'{base}/{pk}/' for pk in args.ids.split(',')]
+
+    load(urls, args.token, args.clients, 1)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT count(*) FROM pg_stat_activity '
+                       'WHERE datname = current_database()')
+        # Not counting the connection running this query.
+        before = cursor.fetchone()[0] - 1
+    connection.close()
+    rate = load(urls, args.token, args.clients, args.seconds)
+    server.shutdown()
+    print(json.dumps({'requests_per_second': round(rate, 1),
+                      'connections_after_warmup': before}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=4,
+                        help='server worker threads')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--recipes', type=int, default=50)
+    parser.add_argument('--serve', action='store_true',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--token', help=argparse.SUPPRESS)
+    parser.add_argument('--ids', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args)
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+    from core.models import Recipe
+
+    results = {'threads': args.threads, 'clients': args.clients}
+    with test_database():
+        user = get_user_model().objects.create_user('bench@example.com',
+                                                    'benchpass')
+        token = Token.objects.create(user=user).key
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, title=f'Recipe {i}', time=5, price=10)
+            for i in range(args.recipes)
+        )
+        ids = ','.join(str(recipe.pk) for recipe in recipes)
+        database = connection.settings_dict['NAME']
+        connection.close()
+
+        for label, overrides in CONFIGURATIONS.items():
+            env = {key: value for key, value in os.environ.items()
+                   if not key.startswith(('DB_CONN_', 'DB_POOL'))}
+            env.update(overrides, DB_NAME=database,
+                       DB_POOL_MAX_SIZE=str(args.threads))
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.http_load', '--serve',
+                 '--token', token, '--ids', ids,
+                 '--seconds', str(args.seconds),
+                 '--threads', str(args.threads),
+                 '--clients', str(args.clients)],
+                env=env, check=True, stdout=subprocess.PIPE,
+            ).stdout
+            results[label] = json.loads(output)
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
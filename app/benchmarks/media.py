@@ -0,0 +1,111 @@
+"""Measure the bytes per second one worker serves recipe images at.
+
+Compares django.views.static.serve, which the URLconf used to mount, with
+MediaView through a single-threaded WSGI server, plus the request rate of
+MediaView when nginx sends the file (X-Accel-Redirect). Under a server
+whose wsgi.file_wrapper uses sendfile(), such as gunicorn, MediaView's
+file responses skip Python entirely.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.urls import path
+
+from benchmarks import report, setup, test_database
+
+urlpatterns = []
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def download(url, token, count):
+    """Fetch url count times, return (bytes, seconds)."""
+    request = urllib.request.Request(
+        url, headers={'Authorization': f'Token {token}'}
+    )
+    received = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        with urllib.request.urlopen(request) as response:
+            received += len(response.read())
+    return received, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=5,
+                        help='image size in megabytes')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.files.base import ContentFile
+    from django.core.wsgi import get_wsgi_application
+    from django.test.utils import override_settings
+    from django.views.static import serve
+    from rest_framework.authtoken.models import Token
+    from app.urls import urlpatterns as app_urlpatterns
+    from core.models import Recipe
+
+    media_root = tempfile.mkdtemp()
+    urlpatterns[:] = [
+        path('legacy/<path:path>', serve, {'document_root': media_root}),
+        *app_urlpatterns,
+    ]
+    results = {'size_mb': args.size, 'requests': args.requests}
+    try:
+        with test_database(), override_settings(
+                MEDIA_ROOT=media_root, ROOT_URLCONF=__name__,
+                ALLOWED_HOSTS=['*']):
+            user = get_user_model().objects.create_user('bench@example.com',
+                                                        'benchpass')
+            token = Token.objects.create(user=user).key
+            recipe = Recipe.objects.create(user=user, title='Borscht',
+                                           time=5, price=25)
+            recipe.image.save('photo.jpg', ContentFile(
+                os.urandom(args.size * 2 ** 20)
+            ))
+
+            server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                                 handler_class=QuietHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base = f'http://127.0.0.1:{server.server_port}'
+            name = recipe.image.name
+            urls = {
+                'static_serve': f'{base}/legacy/{name}',
+                'media_view': f'{base}{settings.MEDIA_URL}{name}',
+            }
+            for label, url in urls.items():
+                received, seconds = download(url, token, args.requests)
+                results[f'{label}_mb_per_second'] = round(
+                    received / seconds / 2 ** 20, 1
+                )
+
+            accel = dict(settings.MEDIA_SERVE, BACKEND='x-accel-redirect')
+            with override_settings(MEDIA_SERVE=accel):
+                _, seconds = download(urls['media_view'], token,
+                                      args.requests)
+            results['accel_redirect_requests_per_second'] = round(
+                args.requests / seconds, 1
+            )
+            server.shutdown()
+    finally:
+        shutil.rmtree(media_root)
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
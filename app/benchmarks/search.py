@@ -0,0 +1,113 @@
+"""Time recipe search with the GIN index against substring matching.
+
+Seeds --rows recipes (a million by default) for one user, then requests
+the first page of ?search= results for a few terms, once with full-text
+search and once with the substring fallback used on other databases.
+"""
+import argparse
+import random
+import statistics
+import time
+from unittest.mock import patch
+
+from benchmarks import (authenticated_client, report, setup, test_database,
+                        timer)
+
+WORDS = [
+    'apple', 'bean', 'beetroot', 'cabbage', 'carrot', 'cheese', 'chicken',
+    'chili', 'dumpling', 'garlic', 'lemon', 'mushroom', 'noodle', 'onion',
+    'pancake', 'pepper', 'pie', 'potato', 'rice', 'salad', 'soup', 'stew',
+    'tomato', 'walnut',
+]
+TERMS = ['soup', 'beetroot salad', 'mushroom', 'walnut pie']
+
+
+def seed(user, rows, batch):
+    """Bulk insert rows recipes with random titles, tags and ingredients."""
+    from core.models import Ingredient, Recipe, Tag
+
+    rng = random.Random(0)
+    tags = Tag.objects.bulk_create(
+        [Tag(user=user, name=word.title()) for word in WORDS[:8]]
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        [Ingredient(user=user, name=word.title()) for word in WORDS]
+    )
+    Tagged = Recipe.tags.through
+    Contains = Recipe.ingredients.through
+    for start in range(0, rows, batch):
+        recipes = Recipe.objects.bulk_create([
+            Recipe(user=user, title=' '.join(rng.sample(WORDS, 3)).title(),
+                   time=rng.randint(5, 120), price=rng.randint(1, 99))
+            for _ in range(min(batch, rows - start))
+        ])
+        Tagged.objects.bulk_create([
+            Tagged(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes for tag in rng.sample(tags, 2)
+        ])
+        Contains.objects.bulk_create([
+            Contains(recipe_id=recipe.id, ingredient_id=ingredient.id)
+            for recipe in recipes for ingredient in rng.sample(ingredients, 4)
+        ])
+
+
+def time_searches(client, url, repeat):
+    """Return the median milliseconds of a first page per search term."""
+    times = {}
+    for term in TERMS:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url, {'search': term})
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.data
+        times[term] = round(statistics.median(samples) * 1000, 1)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=10000,
+                        help='recipes per insert while seeding')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='requests per search term')
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import override_settings
+    from django.urls import reverse
+    from core.models import Recipe
+    from core.search import is_supported, update_search_vectors
+
+    if not is_supported():
+        parser.error('full-text search needs a PostgreSQL database')
+
+    url = reverse('recipe:recipe-list')
+    results = {'rows': args.rows}
+    with test_database(), override_settings(
+            RESPONSE_CACHE={'CACHE_ALIAS': 'default', 'TIMEOUT': 0,
+                            'VERSION_TIMEOUT': 0}):
+        user = get_user_model().objects.create_user('bench@example.com',
+                                                    'benchpass')
+        client = authenticated_client(user)
+        with timer(results, 'seed_seconds'):
+            seed(user, args.rows, args.batch)
+        with timer(results, 'index_seconds'):
+            update_search_vectors(Recipe.objects.all())
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_recipe')
+
+        cache.clear()
+        results['fulltext_ms'] = time_searches(client, url, args.repeat)
+        with patch('core.search.is_supported', return_value=False):
+            results['substring_ms'] = time_searches(client, url, args.repeat)
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
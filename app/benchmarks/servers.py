@@ -0,0 +1,152 @@
+"""Compare the throughput of runserver and the production servers.
+
+Starts each server on the recipe list endpoint of a seeded test database
+and loads it from several client processes:
+
+- runserver: what docker-compose.yml runs
+- gunicorn_wsgi: gunicorn with app.gunicorn_conf and threaded workers
+- gunicorn_asgi: gunicorn with uvicorn workers serving app.asgi
+
+Response caching is off, so every request queries the database.
+"""
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import report, setup, test_database
+
+SERVERS = {
+    'runserver': [sys.executable, 'manage.py', 'runserver', '{bind}'],
+    'gunicorn_wsgi': [sys.executable, '-m', 'gunicorn',
+                      '-c', 'python:app.gunicorn_conf', '-b', '{bind}',
+                      'app.wsgi'],
+    'gunicorn_asgi': [sys.executable, '-m', 'gunicorn',
+                      '-c', 'python:app.gunicorn_conf', '-b', '{bind}',
+                      '-k', 'uvicorn.workers.UvicornWorker', 'app.asgi'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not start.')
+
+
+def client(port, path, token, seconds):
+    """Request path with a keep-alive connection, return (count, errors)."""
+    headers = {'Authorization': f'Token {token}'}
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    count = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            errors += 1
+            continue
+        if response.status != 200:
+            errors += 1
+        count += 1
+        if response.will_close:
+            connection.close()
+    connection.close()
+    return count, errors
+
+
+def load(port, path, token, clients, seconds):
+    """Run clients processes against port, return (requests/sec, errors)."""
+    with ProcessPoolExecutor(clients) as executor:
+        start = time.perf_counter()
+        futures = [executor.submit(client, port, path, token, seconds)
+                   for _ in range(clients)]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+    return (sum(count for count, _ in results) / elapsed,
+            sum(errors for _, errors in results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--workers', type=int,
+                        help='gunicorn workers, defaults to the config')
+    parser.add_argument('--servers', nargs='+', choices=SERVERS,
+                        default=list(SERVERS))
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+    from core.models import Recipe, Tag
+
+    results = {'clients': args.clients, 'cores': os.cpu_count()}
+    with test_database():
+        user = get_user_model().objects.create_user('bench@example.com',
+                                                    'benchpass')
+        token = Token.objects.create(user=user).key
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag {i}') for i in range(10)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, title=f'Recipe {i}', time=5, price=10)
+            for i in range(args.recipes)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tags[i % len(tags)])
+            for i, recipe in enumerate(recipes)
+        )
+        env = dict(os.environ, DB_NAME=connection.settings_dict['NAME'],
+                   RESPONSE_CACHE_TIMEOUT='0', GUNICORN_ACCESS_LOG='')
+        if args.workers:
+            env['WEB_CONCURRENCY'] = str(args.workers)
+        connection.close()
+
+        for label in args.servers:
+            port = free_port()
+            command = [part.format(bind=f'127.0.0.1:{port}')
+                       for part in SERVERS[label]]
+            server = subprocess.Popen(command, env=env,
+                                      stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL,
+                                      start_new_session=True)
+            try:
+                wait_until_up(port)
+                load(port, '/api/recipe/recipes/', token, args.clients, 1)
+                rate, errors = load(port, '/api/recipe/recipes/', token,
+                                    args.clients, args.seconds)
+            finally:
+                # runserver's autoreloader serves from a child process.
+                os.killpg(server.pid, signal.SIGTERM)
+                server.wait(30)
+                time.sleep(1)
+            results[label] = {'requests_per_second': round(rate, 1),
+                              'errors': errors}
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
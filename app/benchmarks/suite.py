@@ -0,0 +1,366 @@
+"""Measure the main recipe endpoints in a way that compares across commits.
+
+Seeds a test database with the seed_recipes command, then runs each
+scenario (list, detail, filter, create, upload) through the Django test
+client in this process and over HTTP against gunicorn. For each it
+reports p50/p95/p99 latency, queries per request, read from the
+Server-Timing header, and the peak RSS of the serving processes:
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json
+    python -m benchmarks.suite --compare before.json after.json
+
+--threshold makes --compare exit with an error when p95 latency or
+queries per request of any scenario grew by more than that percentage.
+Peak RSS is read from /proc, so it's only reported on Linux.
+"""
+import argparse
+import gc
+import http.client
+import io
+import json
+import math
+import os
+import re
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import report, setup, test_database
+from benchmarks.servers import SERVERS, free_port, wait_until_up
+
+SCENARIOS = 'list', 'detail', 'filter', 'create', 'upload'
+MODES = 'client', 'http'
+COMPARED = 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request', \
+           'peak_rss_mb'
+QUERIES_RE = re.compile(r'(\d+) queries')
+
+
+def percentile(ordered, percent):
+    """Return the nearest-rank percentile of a sorted list."""
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def reset_peak_rss(pids):
+    """Restart the peak RSS count of each process, where Linux allows."""
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/clear_refs', 'w') as file:
+                file.write('5')
+        except OSError:
+            pass
+
+
+def peak_rss(pids):
+    """Return the summed peak RSS of the processes in megabytes, or None."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as file:
+                for line in file:
+                    if line.startswith('VmHWM:'):
+                        total += int(line.split()[1])
+        except OSError:
+            return None
+    return round(total / 1024, 1)
+
+
+def process_group(pgid):
+    """Return the pids of the processes in a process group."""
+    pids = []
+    for name in os.listdir('/proc'):
+        try:
+            if name.isdigit() and os.getpgid(int(name)) == pgid:
+                pids.append(int(name))
+        except OSError:
+            pass
+    return pids
+
+
+def make_images(count):
+    """Return count distinct small JPEGs, as uploads are deduplicated."""
+    from PIL import Image
+
+    images = []
+    for index in range(count):
+        buffer = io.BytesIO()
+        color = index % 256, index // 256 % 256, 128
+        Image.new('RGB', (640, 480), color).save(buffer, 'JPEG')
+        images.append(buffer.getvalue())
+    return images
+
+
+def scenarios(user, count):
+    """Return {name: request(i)} building the i-th request of a scenario.
+
+    A request is a (method, path, body, content type) tuple, so both modes
+    send exactly the same bytes.
+    """
+    from django.db.models import Count
+    from django.test.client import (BOUNDARY, MULTIPART_CONTENT,
+                                    encode_multipart)
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.urls import reverse
+    from core.models import Ingredient, Recipe, Tag
+
+    recipe_ids = list(Recipe.objects.filter(user=user)
+                      .order_by('id').values_list('id', flat=True))
+    tag_ids, ingredient_ids = (
+        list(model.objects.filter(user=user).annotate(uses=Count('recipe'))
+             .order_by('-uses', 'id').values_list('id', flat=True)[:3])
+        for model in (Tag, Ingredient)
+    )
+    images = make_images(count)
+    list_url = reverse('recipe:recipe-list')
+
+    def detail(i):
+        pk = recipe_ids[i % len(recipe_ids)]
+        return 'GET', reverse('recipe:recipe-detail', args=[pk]), b'', ''
+
+    def create(i):
+        body = json.dumps({
+            'title': f'Benchmark stew {i}', 'time': 30, 'price': '7.50',
+            'tags': tag_ids[:1], 'ingredients': ingredient_ids[:2],
+        }).encode()
+        return 'POST', list_url, body, 'application/json'
+
+    def upload(i):
+        pk = recipe_ids[i % len(recipe_ids)]
+        image = SimpleUploadedFile(f'photo{i}.jpg', images[i % len(images)],
+                                   'image/jpeg')
+        return ('POST', reverse('recipe:recipe-upload-image', args=[pk]),
+                encode_multipart(BOUNDARY, {'image': image}),
+                MULTIPART_CONTENT)
+
+    filter_url = f'{list_url}?tags={tag_ids[0]}&ingredients=' \
+                 f'{",".join(map(str, ingredient_ids[:2]))}'
+    return {
+        'list': lambda i: ('GET', list_url, b'', ''),
+        'detail': detail,
+        'filter': lambda i: ('GET', filter_url, b'', ''),
+        'create': create,
+        'upload': upload,
+    }
+
+
+def summarize(latencies, queries, elapsed, rss):
+    """Return the statistics of a scenario run."""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 2),
+        'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+        'peak_rss_mb': rss,
+    }
+
+
+def run_scenario(send, build, args, pids):
+    """Time args.requests calls of send(*build(i)) after a warm-up."""
+    for index in range(args.warmup):
+        send(*build(args.requests + index))
+    reset_peak_rss(pids)
+    latencies, queries = [], []
+    start = time.perf_counter()
+    for index in range(args.requests):
+        began = time.perf_counter()
+        status, timing = send(*build(index))
+        latencies.append(time.perf_counter() - began)
+        if status >= 400:
+            raise RuntimeError(f'Request {index} failed with {status}.')
+        queries.append(int(QUERIES_RE.search(timing).group(1)))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, queries, elapsed, peak_rss(pids))
+
+
+def run_in_process(builds, token, args):
+    """Run the scenarios through the Django test client."""
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import override_settings
+    from recipe import images
+
+    client = Client()
+
+    def send(method, path, body, content_type):
+        response = client.generic(method, path, body, content_type,
+                                  HTTP_AUTHORIZATION=f'Token {token}')
+        return response.status_code, response.get('Server-Timing', '')
+
+    metrics = dict(settings.REQUEST_METRICS, SAMPLE_RATE=1,
+                   SERVER_TIMING=True, SINKS=[])
+    results = {}
+    with override_settings(REQUEST_METRICS=metrics, ALLOWED_HOSTS=['*']):
+        for name in args.scenarios:
+            results[name] = run_scenario(send, builds[name], args,
+                                         [os.getpid()])
+    # Let the image jobs of the uploads finish, and collect their threads'
+    # database connections, which would keep the test database in use.
+    if images._executor is not None:
+        images._executor.shutdown(wait=True)
+        images._executor = None
+        gc.collect()
+    return results
+
+
+def run_over_http(builds, token, args, env):
+    """Run the scenarios against gunicorn over one keep-alive connection."""
+    port = free_port()
+    command = [part.format(bind=f'127.0.0.1:{port}')
+               for part in SERVERS['gunicorn_wsgi']]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+
+    def send(method, path, body, content_type):
+        headers = {'Authorization': f'Token {token}'}
+        if content_type:
+            headers['Content-Type'] = content_type
+        connection.request(method, path, body or None, headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, response.getheader('Server-Timing', '')
+
+    results = {}
+    try:
+        wait_until_up(port)
+        pids = process_group(server.pid)
+        for name in args.scenarios:
+            results[name] = run_scenario(send, builds[name], args, pids)
+    finally:
+        connection.close()
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(30)
+        time.sleep(1)
+    return results
+
+
+def git_commit():
+    """Return the checked out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], check=True,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        ).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path, threshold):
+    """Report the change of each statistic, return the regressions."""
+    with open(before_path) as file:
+        before = json.load(file)
+    with open(after_path) as file:
+        after = json.load(file)
+    changes, regressions = {}, []
+    for mode, results in after['results'].items():
+        for name, stats in results.items():
+            old = before['results'].get(mode, {}).get(name)
+            if old is None:
+                continue
+            for key in COMPARED:
+                if old.get(key) is None or stats.get(key) is None:
+                    continue
+                change = round((stats[key] - old[key]) / old[key] * 100, 1) \
+                    if old[key] else None
+                changes.setdefault(mode, {}).setdefault(name, {})[key] = {
+                    'before': old[key], 'after': stats[key],
+                    'change_percent': change,
+                }
+                if threshold is not None and change is not None and \
+                        key in ('p95_ms', 'queries_per_request') and \
+                        change > threshold:
+                    regressions.append(f'{mode} {name} {key} +{change}%')
+    report({'before': before['meta'].get('commit'),
+            'after': after['meta'].get('commit'),
+            'changes': changes, 'regressions': regressions})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--recipes', type=int, default=100,
+                        help='recipes per seeded user')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS,
+                        default=list(SCENARIOS))
+    parser.add_argument('--modes', nargs='+', choices=MODES,
+                        default=list(MODES))
+    parser.add_argument('--workers', type=int, default=2,
+                        help='gunicorn workers in http mode')
+    parser.add_argument('--output', help='also write the results here')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two earlier outputs instead')
+    parser.add_argument('--threshold', type=float,
+                        help='percent growth --compare fails on')
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    media_root = tempfile.mkdtemp()
+    metrics_dir = tempfile.mkdtemp()
+    os.environ.update(MEDIA_ROOT=media_root, RESPONSE_CACHE_TIMEOUT='0')
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+    from core.management.commands.seed_recipes import seed_email
+
+    results = {}
+    try:
+        with test_database():
+            call_command('seed_recipes', users=args.users,
+                         recipes=args.recipes, stdout=open(os.devnull, 'w'))
+            user = get_user_model().objects.get(email=seed_email(0))
+            token = Token.objects.create(user=user).key
+            builds = scenarios(user, args.requests + args.warmup)
+            if 'client' in args.modes:
+                results['client'] = run_in_process(builds, token, args)
+            if 'http' in args.modes:
+                env = dict(os.environ,
+                           DB_NAME=connection.settings_dict['NAME'],
+                           GUNICORN_ACCESS_LOG='',
+                           WEB_CONCURRENCY=str(args.workers),
+                           REQUEST_METRICS_SAMPLE_RATE='1',
+                           REQUEST_METRICS_SERVER_TIMING='1',
+                           PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+                connection.close()
+                results['http'] = run_over_http(builds, token, args, env)
+    finally:
+        shutil.rmtree(media_root)
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+    output = {
+        'meta': {
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'cores': len(os.sched_getaffinity(0)),
+            'users': args.users,
+            'recipes_per_user': args.recipes,
+            'requests': args.requests,
+            'workers': args.workers,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(output, file, indent=2, sort_keys=True)
+    report(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Measure what throttling adds to each request, and its memory per key.
+
+Calls allow_request() --requests times for each throttle, spreading the
+requests over --users users at a rate none of them reaches, and compares
+the time per call with DRF's own UserRateThrottle. Memory is measured
+with tracemalloc after every user has made --history requests, which is
+what DRF's per-request timestamps grow with. Cache-backed throttles use
+an unbounded in-process cache, so that its memory can be traced too.
+"""
+import argparse
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks import report, setup
+
+
+def make_requests(users):
+    """Return one authenticated request stand-in per user."""
+    return [
+        SimpleNamespace(method='GET', META={'REMOTE_ADDR': '127.0.0.1'},
+                        user=SimpleNamespace(is_authenticated=True, pk=pk))
+        for pk in range(users)
+    ]
+
+
+def run(throttle_class, requests, count):
+    """Run count throttle checks, return the microseconds per check."""
+    start = time.perf_counter()
+    for i in range(count):
+        throttle = throttle_class()
+        assert throttle.allow_request(requests[i % len(requests)], None)
+    return (time.perf_counter() - start) / count * 10 ** 6
+
+
+def memory_per_key(throttle_class, requests, history):
+    """Return the bytes the throttle keeps per user after history hits."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(history):
+        for request in requests:
+            throttle_class().allow_request(request, None)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return round(used / len(requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--history', type=int, default=20)
+    args = parser.parse_args()
+    setup()
+
+    from django.core.cache import cache
+    from django.test.utils import override_settings
+    from rest_framework.throttling import UserRateThrottle
+    from core.throttling import UserThrottle, get_counter_store
+
+    class CacheHistoryThrottle(UserRateThrottle):
+        rate = '1000000/minute'
+
+    class SlidingWindowUserThrottle(UserThrottle):
+        rate = '1000000/minute'
+
+    requests = make_requests(args.users)
+    stores = {
+        'local_store': {'CACHE_ALIAS': None, 'MAX_SIZE': 10 ** 6},
+        'shared_store': {'CACHE_ALIAS': 'default'},
+    }
+    results = {'requests': args.requests, 'users': args.users,
+               'history': args.history}
+    override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 7},
+    }}).enable()
+    results['drf_history'] = {
+        'us_per_request': round(run(CacheHistoryThrottle, requests,
+                                    args.requests), 1),
+    }
+    cache.clear()
+    results['drf_history']['bytes_per_key'] = memory_per_key(
+        CacheHistoryThrottle, requests, args.history
+    )
+    for name, options in stores.items():
+        with override_settings(THROTTLE_STORE=options):
+            cache.clear()
+            results[name] = {
+                'us_per_request': round(run(SlidingWindowUserThrottle,
+                                            requests, args.requests), 1),
+            }
+            get_counter_store().clear()
+            results[name]['bytes_per_key'] = memory_per_key(
+                SlidingWindowUserThrottle, requests, args.history
+            )
+
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Serve the Django application to ASGI servers.
+
+Django 2.1 has no ASGI handler, so requests go through the WSGI handler
+on worker threads. asgiref's WsgiToAsgi would run every request of a
+process on one shared thread, so a slow query would hold up the rest.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+_executor = None
+
+
+def get_request_executor():
+    """Return the threads requests run on, ASGI_THREADS['REQUESTS'] of them.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(settings.ASGI_THREADS['REQUESTS'],
+                                       thread_name_prefix='asgi-request')
+    return _executor
+
+
+class URLConfWSGIHandler(WSGIHandler):
+    """WSGIHandler resolving every request with the given URLconf."""
+
+    def __init__(self, urlconf=None):
+        super().__init__()
+        self.urlconf = urlconf
+
+    def get_response(self, request):
+        if self.urlconf is not None:
+            request.urlconf = self.urlconf
+        return super().get_response(request)
+
+
+def closing(application):
+    """Wrap a WSGI application so its responses are closed once sent.
+
+    WSGI servers must close responses, which is what sends Django's
+    request_finished signal; asgiref doesn't.
+    """
+    def wrapper(environ, start_response):
+        response = application(environ, start_response)
+        try:
+            yield from response
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+    return wrapper
+
+
+class ThreadedWsgiToAsgiInstance(WsgiToAsgiInstance):
+
+    def __init__(self, wsgi_application):
+        super().__init__(closing(wsgi_application))
+
+    async def run_wsgi_app(self, body):
+        # The parent's method, undecorated from its sync_to_async().
+        run = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+        await sync_to_async(run, thread_sensitive=False,
+                            executor=get_request_executor())(self, body)
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi running requests concurrently on a pool of threads."""
+
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiToAsgiInstance(self.wsgi_application)(
+            scope, receive, send
+        )
+
+
+def get_asgi_application(urlconf=None):
+    """Set Django up and return the ASGI application, like
+    get_wsgi_application() does for WSGI.
+    """
+    django.setup(set_prefix=False)
+    return ThreadedWsgiToAsgi(URLConfWSGIHandler(urlconf))
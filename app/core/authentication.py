@@ -0,0 +1,134 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.metrics import CACHE_REQUESTS
+
+
+class LocalTokenStore:
+    """In-process LRU cache of tokens whose entries expire after a TTL.
+
+    Like a shared cache, it keeps and hands out copies, so requests on
+    other threads never see a user a view is changing.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached token for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, token = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(token)
+
+    def set(self, key, token):
+        """Cache token under key, evicting the least recently used entry."""
+        token = copy.deepcopy(token)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Drop key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedTokenStore:
+    """Token cache kept in one of Django's cache backends.
+
+    Entries are shared by every process using the backend, so invalidating
+    a token in one process invalidates it everywhere.
+    """
+    key_prefix = 'auth:token:'
+
+    def __init__(self, alias, ttl):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def _cache_key(self, key):
+        """Return the cache key of a token without exposing the token."""
+        return self.key_prefix + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        return self.cache.get(self._cache_key(key))
+
+    def set(self, key, token):
+        self.cache.set(self._cache_key(key), token, self.ttl)
+
+    def delete(self, key):
+        self.cache.delete(self._cache_key(key))
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+
+
+def get_token_store():
+    """Return the token store configured by settings.TOKEN_AUTH_CACHE."""
+    global _store
+    if _store is None:
+        options = settings.TOKEN_AUTH_CACHE
+        if options.get('CACHE_ALIAS'):
+            _store = SharedTokenStore(options['CACHE_ALIAS'], options['TTL'])
+        else:
+            _store = LocalTokenStore(options['MAX_SIZE'], options['TTL'])
+    return _store
+
+
+@receiver(setting_changed)
+def reset_token_store(setting, **kwargs):
+    """Rebuild the token store when its settings change in tests."""
+    global _store
+    if setting in ('TOKEN_AUTH_CACHE', 'CACHES'):
+        _store = None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches tokens instead of querying each time.
+
+    Cached tokens are dropped when they are deleted and when their user is
+    saved, which covers deactivation and password changes.
+    """
+
+    def authenticate_credentials(self, key):
+        store = get_token_store()
+        token = store.get(key)
+        result = 'miss' if token is None else 'hit'
+        CACHE_REQUESTS.labels('token', result).inc()
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            store.set(key, token)
+        elif not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
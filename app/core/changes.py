@@ -0,0 +1,81 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+_local = threading.local()
+
+
+def _version_cache_key(user_id):
+    return f'data-version:{user_id}'
+
+
+def get_data_version(user_id):
+    """Return (data_version, data_modified_at) of a user.
+
+    The pair is cached for RESPONSE_CACHE['VERSION_TIMEOUT'] seconds, which
+    is only safe with a cache shared by every process, since writes clear
+    it from the cache they run next to.
+    """
+    options = settings.RESPONSE_CACHE
+    timeout = options['VERSION_TIMEOUT']
+    cache = caches[options['CACHE_ALIAS']]
+    key = _version_cache_key(user_id)
+    if timeout:
+        version = cache.get(key)
+        if version is not None:
+            return version
+
+    version = get_user_model().objects \
+        .values_list('data_version', 'data_modified_at') \
+        .get(pk=user_id)
+    if timeout:
+        cache.set(key, version, timeout)
+    return version
+
+
+def _forget_versions(user_ids):
+    """Drop the cached data versions of users."""
+    keys = [_version_cache_key(pk) for pk in user_ids]
+    cache = caches[settings.RESPONSE_CACHE['CACHE_ALIAS']]
+    cache.delete_many(keys)
+    # A request may have cached the old version before the commit.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def data_changed(*user_ids):
+    """Record that the recipes, tags or ingredients of users changed.
+
+    Bumps each user's data version, which conditional GETs and cached list
+    responses are keyed on. Inside batch_data_changes() the bump is
+    deferred to the end of the batch.
+    """
+    user_ids = {pk for pk in user_ids if pk is not None}
+    batch = getattr(_local, 'batch', None)
+    if batch is not None:
+        batch.update(user_ids)
+    elif user_ids:
+        get_user_model().objects.filter(pk__in=user_ids).update(
+            data_version=F('data_version') + 1,
+            data_modified_at=timezone.now(),
+        )
+        _forget_versions(user_ids)
+
+
+@contextmanager
+def batch_data_changes():
+    """Bump each changed user's data version once for the whole block."""
+    if getattr(_local, 'batch', None) is not None:
+        yield
+        return
+    _local.batch = set()
+    try:
+        yield
+    finally:
+        user_ids, _local.batch = _local.batch, None
+    data_changed(*user_ids)
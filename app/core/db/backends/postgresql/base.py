@@ -0,0 +1,128 @@
+"""PostgreSQL backend with connection health checks and optional pooling.
+
+Configured through two extra keys of the DATABASES entry:
+
+- CONN_HEALTH_CHECKS: before a persistent connection is reused by a new
+  request, run SELECT 1 on it and reconnect if that fails.
+- POOL: a dict with MIN_SIZE, MAX_SIZE, IDLE_TIMEOUT and TIMEOUT. When
+  given, connections come from a pool shared by the threads of the
+  process, and closing one returns it there. Connections asked for with
+  other parameters than the configured ones, like the probes of
+  wait_for_db, are opened directly.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, name, options, connect):
+    """Return the process's pool for the database, creating it on first use.
+    """
+    # Connections must not cross a fork, so pools are per process. The
+    # name is part of the key because tests switch to another database.
+    key = alias, name, os.getpid()
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                connect,
+                min_size=options.get('MIN_SIZE', 1),
+                max_size=options.get('MAX_SIZE', 10),
+                idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                timeout=options.get('TIMEOUT', 10),
+            )
+        return _pools[key]
+
+
+def get_pools():
+    """Return (alias, pool) pairs of the pools of this process."""
+    with _pools_lock:
+        return [(alias, pool) for (alias, _, pid), pool in _pools.items()
+                if pid == os.getpid()]
+
+
+def close_pools():
+    """Close the idle connections of every pool in this process."""
+    for _, pool in get_pools():
+        pool.close_all()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        return get_pool(self.alias, self.settings_dict['NAME'], options,
+                        self.connect_to_database)
+
+    def connect_to_database(self):
+        return Database.connect(**self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None or conn_params != self.get_connection_params():
+            return super().get_new_connection(conn_params)
+        try:
+            connection = pool.acquire(check=self.check_connection
+                                      if self.health_checks else None)
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error)) from error
+        # Let the parent read and apply isolation_level as it would on a
+        # fresh connection.
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get('isolation_level',
+                                           connection.isolation_level)
+        if connection.isolation_level != self.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        pool.release(self.connection)
+
+    @property
+    def health_checks(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def check_connection(self, connection):
+        """Return whether a query goes through on connection."""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Called as each request starts and finishes: the next query the
+        # connection serves checks it first.
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if self.connection is not None and not self.health_check_done and \
+                self.health_checks and not self.in_atomic_block:
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def connect(self):
+        # A connection that is being opened doesn't need checking.
+        self.health_check_done = True
+        super().connect()
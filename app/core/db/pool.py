@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up in time."""
+
+
+class ConnectionPool:
+    """A thread-safe pool of DB-API connections.
+
+    At most `max_size` connections are open at once; `acquire()` blocks up
+    to `timeout` seconds for one to be released. Idle connections are
+    reused last in, first out, and those idle for longer than
+    `idle_timeout` seconds are closed, down to `min_size`.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300,
+                 timeout=10):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError('Need 0 <= min_size <= max_size and '
+                             'max_size >= 1.')
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.idle = deque()
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, check=None):
+        """Return a connection, opening one if the pool isn't full.
+
+        check(connection) may return False to have a connection that went
+        bad while idle closed and replaced.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            while True:
+                self.close_expired()
+                if self.idle:
+                    connection, _ = self.idle.pop()
+                    break
+                if self.size < self.max_size:
+                    self.size += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f'No connection available within {self.timeout} '
+                        f'seconds ({self.max_size} in use).'
+                    )
+                self.condition.wait(remaining)
+
+        if connection is None:
+            try:
+                return self.connect()
+            except BaseException:
+                self.discard()
+                raise
+        if getattr(connection, 'closed', False) or \
+                (check is not None and not check(connection)):
+            self.discard(connection)
+            return self.acquire(check)
+        return connection
+
+    def release(self, connection):
+        """Give connection back, closing it if it can't be reused."""
+        if getattr(connection, 'closed', False):
+            self.discard(connection)
+            return
+        try:
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection=None):
+        """Close a checked-out connection and free its slot."""
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close_expired(self):
+        """Close idle connections past idle_timeout. Caller holds the lock."""
+        cutoff = time.monotonic() - self.idle_timeout
+        # The oldest connections are on the left.
+        while self.idle and self.idle[0][1] < cutoff and \
+                self.size > self.min_size:
+            connection, _ = self.idle.popleft()
+            self.size -= 1
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Return the number of connections in use and idle."""
+        with self.condition:
+            idle = len(self.idle)
+            return {'in_use': self.size - idle, 'idle': idle}
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self.condition:
+            while self.idle:
+                connection, _ = self.idle.popleft()
+                self.size -= 1
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            self.condition.notify_all()
@@ -0,0 +1,94 @@
+"""Send the reads of safe API requests to read replicas.
+
+Views opt in with ReplicaReadMixin. Everything else, including writes and
+the reads of unsafe requests, management commands and background jobs,
+uses the default database.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from rest_framework.permissions import SAFE_METHODS
+
+_local = threading.local()
+
+
+def _pin_cache_key(user_id):
+    return f'db-primary:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Read user_id's requests from the primary for PIN_SECONDS."""
+    options = settings.DATABASE_ROUTING
+    caches[options['CACHE_ALIAS']].set(_pin_cache_key(user_id), True,
+                                       options['PIN_SECONDS'])
+
+
+def is_pinned(user_id):
+    """Return whether user_id wrote recently enough to need the primary."""
+    if user_id is None:
+        return False
+    cache = caches[settings.DATABASE_ROUTING['CACHE_ALIAS']]
+    return cache.get(_pin_cache_key(user_id), False)
+
+
+def get_read_alias():
+    """Return the replica this thread reads from, or None for the primary.
+    """
+    return getattr(_local, 'read_alias', None)
+
+
+def set_read_alias(alias):
+    _local.read_alias = alias
+
+
+class ReplicaRouter:
+    """Read from the replica the current request picked, write to default.
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Instances read from a replica would otherwise be saved back there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_ROUTING['REPLICAS']:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """View mixin reading safe requests from a random replica.
+
+    Authentication still reads from the primary, so a token created a
+    moment ago works. An unsafe request pins its user to the primary for
+    DATABASE_ROUTING['PIN_SECONDS'], so the user's next reads see the
+    write even while the replicas lag behind.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        previous = get_read_alias()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            set_read_alias(previous)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replicas = settings.DATABASE_ROUTING['REPLICAS']
+        user_id = request.user.pk
+        if request.method not in SAFE_METHODS:
+            set_read_alias(None)
+            if replicas and user_id is not None:
+                pin_to_primary(user_id)
+        elif replicas and not is_pinned(user_id):
+            set_read_alias(random.choice(replicas))
@@ -0,0 +1,30 @@
+"""Password hashers whose cost is set in settings.PASSWORD_HASHING.
+
+Changing a cost makes must_update() true for hashes made with the old
+one, so Django rehashes each password the next time its user logs in.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (Argon2PasswordHasher,
+                                         BCryptSHA256PasswordHasher)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHING['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHING['ARGON2_MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHING['ARGON2_PARALLELISM']
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_HASHING['BCRYPT_ROUNDS']
@@ -0,0 +1,188 @@
+import itertools
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Ingredient, Recipe, Tag
+from core.signals import bulk_saved
+
+TAG_WORDS = [
+    'vegan', 'vegetarian', 'dessert', 'breakfast', 'quick', 'dinner',
+    'lunch', 'gluten free', 'spicy', 'healthy', 'baking', 'comfort food',
+    'party', 'soup', 'salad', 'seafood', 'grill', 'kids', 'budget',
+    'holiday',
+]
+INGREDIENT_WORDS = [
+    'salt', 'olive oil', 'garlic', 'onion', 'butter', 'flour', 'sugar',
+    'egg', 'black pepper', 'milk', 'tomato', 'lemon', 'rice', 'chicken',
+    'potato', 'carrot', 'parsley', 'cheese', 'cream', 'basil', 'beef',
+    'honey', 'ginger', 'mushroom', 'spinach', 'chili', 'paprika', 'lentils',
+    'chickpeas', 'yogurt',
+]
+DISHES = [
+    'stew', 'salad', 'soup', 'pie', 'curry', 'bake', 'risotto', 'tart',
+    'stir fry', 'pasta', 'bowl', 'sandwich',
+]
+
+
+def seed_email(index):
+    """Return the email of the seeded user with the given index."""
+    return f'seed-{index}@example.com'
+
+
+def vocabulary(words, size):
+    """Return size names, the given words first and numbered ones after."""
+    names = words[:size]
+    for number in itertools.count(2):
+        if len(names) >= size:
+            return names
+        names.extend(f'{word} {number}' for word in words[:size - len(names)])
+
+
+class ZipfSampler:
+    """Draw distinct names, the one of rank k with weight 1 / k ** s.
+
+    A few names end up on most recipes and the long tail on a handful,
+    like real tags and ingredients.
+    """
+
+    def __init__(self, names, exponent, rng):
+        self.names = names
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank ** exponent for rank in range(1, len(names) + 1)
+        ))
+        self.rng = rng
+
+    def sample(self, count):
+        chosen = {}
+        count = min(count, len(self.names))
+        while len(chosen) < count:
+            for name in self.rng.choices(self.names,
+                                         cum_weights=self.cum_weights,
+                                         k=count - len(chosen)):
+                chosen.setdefault(name)
+        return list(chosen)
+
+
+class Command(BaseCommand):
+    """Django command to fill the database with generated recipes."""
+    help = 'Create users with recipes whose tags and ingredients follow a ' \
+           'Zipf distribution. The same options always create the same data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=50,
+                            help='Recipes per user.')
+        parser.add_argument('--tags', type=int, default=200,
+                            help='Distinct tag names to draw from.')
+        parser.add_argument('--ingredients', type=int, default=1000,
+                            help='Distinct ingredient names to draw from.')
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Zipf exponent; higher means more overlap.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--password', default='seedpass',
+                            help='Password of every seeded user.')
+        parser.add_argument('--batch', type=int, default=5000,
+                            help='Recipes written per transaction.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously seeded users first.')
+
+    def seeded_users(self):
+        return get_user_model().objects.filter(
+            email__startswith='seed-', email__endswith='@example.com'
+        )
+
+    def plan(self, options, rng):
+        """Yield the (title, time, price, tags, ingredients) of a recipe."""
+        tags = ZipfSampler(vocabulary(TAG_WORDS, options['tags']),
+                           options['exponent'], rng)
+        ingredients = ZipfSampler(
+            vocabulary(INGREDIENT_WORDS, options['ingredients']),
+            options['exponent'], rng,
+        )
+        for _ in range(options['recipes']):
+            names = ingredients.sample(rng.randint(3, 12))
+            yield (
+                f'{names[0].capitalize()} {rng.choice(DISHES)}',
+                rng.randint(5, 180),
+                Decimal(rng.randint(100, 9999)) / 100,
+                tags.sample(rng.randint(1, 5)),
+                names,
+            )
+
+    def seed_users(self, indexes, password, plans):
+        """Bulk insert the users with their tags, ingredients and recipes."""
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(email=seed_email(index),
+                             name=f'Seed user {index}', password=password)
+            for index in indexes
+        ])
+        tags, ingredients = {}, {}
+        for user, recipes in zip(users, plans):
+            for _, _, _, tag_names, ingredient_names in recipes:
+                for name in tag_names:
+                    tags.setdefault((user.pk, name),
+                                    Tag(user=user, name=name))
+                for name in ingredient_names:
+                    ingredients.setdefault((user.pk, name),
+                                           Ingredient(user=user, name=name))
+        Tag.objects.bulk_create(tags.values())
+        Ingredient.objects.bulk_create(ingredients.values())
+
+        recipes = Recipe.objects.bulk_create([
+            Recipe(user=user, title=title, time=minutes, price=price)
+            for user, user_plans in zip(users, plans)
+            for title, minutes, price, _, _ in user_plans
+        ])
+        plan_rows = [(user, plan) for user, user_plans in zip(users, plans)
+                     for plan in user_plans]
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.pk,
+                                tag_id=tags[(user.pk, name)].pk)
+            for recipe, (user, plan) in zip(recipes, plan_rows)
+            for name in plan[3]
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe_id=recipe.pk,
+                ingredient_id=ingredients[(user.pk, name)].pk,
+            )
+            for recipe, (user, plan) in zip(recipes, plan_rows)
+            for name in plan[4]
+        ])
+        bulk_saved.send(sender=Recipe, instances=recipes)
+        return len(tags), len(ingredients), len(recipes)
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.seeded_users().delete()
+        elif self.seeded_users().exists():
+            raise CommandError('Seeded users already exist, pass --clear '
+                               'to replace them.')
+
+        start = time.monotonic()
+        rng = random.Random(options['seed'])
+        password = make_password(options['password'])
+        per_batch = max(1, options['batch'] // max(1, options['recipes']))
+        totals = [0, 0, 0]
+        for first in range(0, options['users'], per_batch):
+            indexes = range(first, min(first + per_batch, options['users']))
+            plans = [list(self.plan(options, rng)) for _ in indexes]
+            with transaction.atomic():
+                counts = self.seed_users(indexes, password, plans)
+            totals = [total + count for total, count in zip(totals, counts)]
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        tags, ingredients, recipes = totals
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {options["users"]} users with {recipes} recipes, '
+            f'{tags} tags and {ingredients} ingredients in '
+            f'{time.monotonic() - start:.1f} seconds.'
+        ))
@@ -1,21 +1,108 @@
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available."""
+    help = 'Wait until the databases accept queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            metavar='ALIAS',
+            help='Database alias to wait for. Can be given several times; '
+                 'aliases are probed in parallel. Defaults to "default".',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Give up after this many seconds.',
+        )
+        parser.add_argument(
+            '--connect-timeout', type=int, default=5,
+            help='Seconds each connection attempt may take.',
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='Seconds to wait after the first failed attempt. Doubles '
+                 'after each further failure.',
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Longest wait between two attempts.',
+        )
+
+    def probe(self, alias, connect_timeout):
+        """Open a new connection to alias and run a query on it."""
+        connection = connections[alias]
+        params = connection.get_connection_params()
+        if connection.vendor == 'postgresql':
+            params['connect_timeout'] = connect_timeout
+        with connection.wrap_database_errors:
+            raw = connection.get_new_connection(params)
+            try:
+                cursor = raw.cursor()
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            finally:
+                raw.close()
+
+    def delay(self, attempt, options):
+        """Return the backoff before the next attempt, with jitter."""
+        delay = min(options['max_delay'],
+                    options['initial_delay'] * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def wait_for(self, alias, deadline, options):
+        """Probe alias until it answers and return how long that took."""
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                self.probe(alias, options['connect_timeout'])
+            except OperationalError as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database "{alias}" unavailable after '
+                        f'{attempt + 1} attempts: {error}'
+                    )
+                delay = min(self.delay(attempt, options), remaining)
+                self.stdout.write(
+                    f'Database "{alias}" unavailable, waiting '
+                    f'{delay:.2f} seconds...'
+                )
+                time.sleep(delay)
+                attempt += 1
+            else:
+                return time.monotonic() - start, attempt + 1
 
     def handle(self, *args, **options):
+        aliases = options['databases'] or ['default']
+        deadline = time.monotonic() + options['timeout']
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            futures = {
+                alias: executor.submit(self.wait_for, alias, deadline,
+                                       options)
+                for alias in aliases
+            }
+            errors = []
+            for alias, future in futures.items():
+                try:
+                    seconds, attempts = future.result()
+                except CommandError as error:
+                    errors.append(str(error))
+                else:
+                    self.stdout.write(
+                        f'Database "{alias}" ready in {seconds:.2f} seconds '
+                        f'({attempts} attempts).'
+                    )
+        if errors:
+            raise CommandError('\n'.join(errors))
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, \
+                              CollectorRegistry, Counter, Gauge, Histogram, \
+                              generate_latest, multiprocess
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# With PROMETHEUS_MULTIPROC_DIR set, as gunicorn_conf does, each process
+# writes its values to its own memory-mapped files there, and a scrape
+# adds up the files of every worker.
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by route, method and status.',
+    ['route', 'method', 'status'],
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request latency by route.',
+    ['route', 'method'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_queries', 'Queries per sampled request by route.',
+    ['route'], buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_seconds', 'SQL time per sampled request by route.',
+    ['route'],
+)
+DUPLICATE_QUERIES = Counter(
+    'http_request_duplicate_queries_total',
+    'Repeated statements of sampled requests by route.', ['route'],
+)
+DB_CONNECTIONS = Counter(
+    'db_connections_total',
+    'Database connections set up, including those taken from a pool.',
+    ['alias'],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections', 'Pooled database connections by state.',
+    ['alias', 'state'], multiprocess_mode='livesum',
+)
+DB_POOL_MAX_CONNECTIONS = Gauge(
+    'db_pool_max_connections', 'Database connections pools may open.',
+    ['alias'], multiprocess_mode='livesum',
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Cache lookups by cache and result.',
+    ['cache', 'result'],
+)
+
+
+def get_registry():
+    """Return the registry to expose, merging every worker's values."""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def exposition():
+    """Return the metrics in the Prometheus text format, and its type."""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+def update_pool_gauges(pools):
+    """Set the pool gauges from (alias, pool) pairs of this process."""
+    for alias, pool in pools:
+        for state, count in pool.stats().items():
+            DB_POOL_CONNECTIONS.labels(alias, state).set(count)
+        DB_POOL_MAX_CONNECTIONS.labels(alias).set(pool.max_size)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS.labels(connection.alias).inc()
+
+
+class LogSink:
+    """Write every request sample as one JSON log line."""
+
+    def record(self, sample):
+        logger.info(json.dumps(sample, sort_keys=True))
+
+
+class PrometheusSink:
+    """Add request samples to the query and SQL time histograms."""
+
+    def record(self, sample):
+        route = sample['view'] or 'unmatched'
+        REQUEST_QUERIES.labels(route).observe(sample['queries'])
+        REQUEST_DB_DURATION.labels(route).observe(sample['db_ms'] / 1000)
+        if sample['duplicate_queries']:
+            DUPLICATE_QUERIES.labels(route).inc(sample['duplicate_queries'])
+
+
+_sinks = None
+
+
+def get_sinks():
+    """Return the sinks listed in settings.REQUEST_METRICS['SINKS']."""
+    global _sinks
+    if _sinks is None:
+        _sinks = [import_string(path)()
+                  for path in settings.REQUEST_METRICS['SINKS']]
+    return _sinks
+
+
+@receiver(setting_changed)
+def reset_sinks(setting, **kwargs):
+    """Rebuild the sinks when their settings change in tests."""
+    global _sinks
+    if setting == 'REQUEST_METRICS':
+        _sinks = None
+
+
+def record(sample):
+    """Pass a request sample to every sink.
+
+    A failing sink is logged and skipped, so it can't fail the request.
+    """
+    for sink in get_sinks():
+        try:
+            sink.record(sample)
+        except Exception:
+            logger.exception('Metrics sink %r failed', sink)
@@ -0,0 +1,172 @@
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics
+from core.db.backends.postgresql.base import get_pools
+
+
+class QueryRecorder:
+    """Execute wrapper counting the queries of a request and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+
+class RequestTimer:
+    """Timings of one sampled request."""
+
+    def __init__(self):
+        self.queries = QueryRecorder()
+        self.start = time.perf_counter()
+        self.view_start = self.view_end = self.render_end = None
+        self.view_sql_seconds = 0
+        self.action = None
+
+    def view_started(self, view_func, method):
+        self.view_start = time.perf_counter()
+        self.action = getattr(view_func, 'actions', {}).get(method.lower())
+
+    def view_ended(self):
+        self.view_end = time.perf_counter()
+        self.view_sql_seconds = self.queries.seconds
+
+    def rendered(self, response):
+        self.render_end = time.perf_counter()
+
+    def sample(self, request, response):
+        """Return the request's measurements as a JSON-ready dict."""
+        end = time.perf_counter()
+        if self.view_end is None:
+            self.view_ended()
+        match = request.resolver_match
+        sample = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'action': self.action,
+            'status': response.status_code,
+            'queries': self.queries.count,
+            'duplicate_queries':
+                self.queries.count - len(self.queries.statements),
+            'db_ms': round(self.queries.seconds * 1000, 2),
+            'total_ms': round((end - self.start) * 1000, 2),
+        }
+        if self.view_start is not None:
+            sample['view_ms'] = round(
+                (self.view_end - self.view_start -
+                 self.view_sql_seconds) * 1000, 2
+            )
+        if self.render_end is not None:
+            sample['render_ms'] = round(
+                (self.render_end - self.view_end) * 1000, 2
+            )
+        if sample['duplicate_queries']:
+            sql, count = self.queries.statements.most_common(1)[0]
+            sample['repeated_query'] = sql[:200]
+            sample['repeated_query_count'] = count
+        return sample
+
+
+def server_timing(sample):
+    """Return the Server-Timing header value of a sample."""
+    entries = [
+        f'db;dur={sample["db_ms"]};desc="{sample["queries"]} queries, '
+        f'{sample["duplicate_queries"]} duplicates"'
+    ]
+    for name in ('view', 'render', 'total'):
+        if f'{name}_ms' in sample:
+            entries.append(f'{name};dur={sample[name + "_ms"]}')
+    return ', '.join(entries)
+
+
+def route_name(request):
+    """Return the URL name the request resolved to, with its namespace."""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class PrometheusMiddleware:
+    """Count every request and its latency by route for /metrics.
+
+    Routes are URL names rather than paths, so each has a fixed set of
+    series. The database pool gauges are refreshed after each request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        route = route_name(request)
+        metrics.REQUEST_DURATION.labels(route, request.method).observe(
+            time.perf_counter() - start
+        )
+        metrics.REQUESTS.labels(route, request.method,
+                                response.status_code).inc()
+        metrics.update_pool_gauges(get_pools())
+        return response
+
+
+class RequestMetricsMiddleware:
+    """Measure queries and time spent per request on a sample of requests.
+
+    Sampled requests record the queries they run on every database, how
+    many of them repeat a statement already run (the usual sign of an
+    N+1 query), the time spent in the view outside SQL, which for DRF
+    views is mostly serialization, and the time rendering the response.
+    Samples go to the sinks in settings.REQUEST_METRICS and, optionally,
+    into a Server-Timing header. Queries run in other threads, such as
+    the concurrent prefetches of the async recipe views, or while a
+    streaming response is sent aren't counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = settings.REQUEST_METRICS
+        if random.random() >= options['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        request.request_timer = timer = RequestTimer()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timer.queries)
+                )
+            response = self.get_response(request)
+
+        sample = timer.sample(request, response)
+        metrics.record(sample)
+        if options['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(sample)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = getattr(request, 'request_timer', None)
+        if timer is not None:
+            timer.view_started(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        timer = getattr(request, 'request_timer', None)
+        if timer is not None:
+            timer.view_ended()
+            response.add_post_render_callback(timer.rendered)
+        return response
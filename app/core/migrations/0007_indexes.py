@@ -0,0 +1,35 @@
+# Generated by Django 2.1.15 on 2026-10-17 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name'], name='core_ingred_user_id_b96ee8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='core_recipe_user_id_bf8313_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='core_tag_user_id_74e398_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx '
+            'ON core_recipe_tags (tag_id, recipe_id)',
+            'DROP INDEX core_recipe_tags_tag_recipe_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx '
+            'ON core_recipe_ingredients (ingredient_id, recipe_id)',
+            'DROP INDEX core_recipe_ingredients_ingredient_recipe_idx',
+        ),
+    ]
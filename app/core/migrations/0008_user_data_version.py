@@ -0,0 +1,23 @@
+# Generated by Django 2.1.15 on 2026-10-17 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='data_modified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.1.15 on 2026-10-17 07:02
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+INDEX_NAME = 'core_recipe_search_vector_gin'
+
+
+def create_search_index(apps, schema_editor):
+    """Index and fill the search vectors on PostgreSQL only."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX {INDEX_NAME} ON core_recipe USING gin (search_vector)'
+    )
+    schema_editor.execute("""
+        UPDATE core_recipe SET search_vector =
+            setweight(to_tsvector('english', title), 'A') ||
+            setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(t.name, ' ')
+                FROM core_tag t
+                JOIN core_recipe_tags rt ON rt.tag_id = t.id
+                WHERE rt.recipe_id = core_recipe.id
+            ), '')), 'B') ||
+            setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(i.name, ' ')
+                FROM core_ingredient i
+                JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+                WHERE ri.recipe_id = core_recipe.id
+            ), '')), 'B')
+    """)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_user_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
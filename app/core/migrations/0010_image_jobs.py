@@ -0,0 +1,45 @@
+# Generated by Django 2.1.15 on 2026-10-17 06:31
+
+import core.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_jobs', to='core.Recipe')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(max_length=4)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('file', models.ImageField(upload_to=core.models.recipe_rendition_file_path)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='core.Recipe')),
+            ],
+            options={
+                'ordering': ('width', 'format'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imagejob',
+            index=models.Index(fields=['status', 'updated_at'], name='core_imagej_status_b127b4_idx'),
+        ),
+    ]
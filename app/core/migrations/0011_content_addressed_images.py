@@ -0,0 +1,25 @@
+# Generated by Django 2.1.15 on 2026-10-17 06:35
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_image_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagerendition',
+            name='file',
+            field=models.ImageField(db_index=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_rendition_file_path),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(db_index=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_image_file_path),
+        ),
+    ]
@@ -3,12 +3,17 @@ import uuid
 
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from .storage import ContentAddressedStorage
+
+image_storage = ContentAddressedStorage()
+
 def recipe_image_file_path(instance, filename):
     """Generate file path for new recipe image."""
     ext = filename.split('.')[-1]
@@ -17,6 +22,14 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads/recipe', filename)
 
 
+def recipe_rendition_file_path(instance, filename):
+    """Generate file path for a resized copy of a recipe image."""
+    ext = filename.split('.')[-1]
+    filename = f'{uuid.uuid4()}-{instance.width}.{ext}'
+
+    return os.path.join('uploads/recipe/renditions', filename)
+
+
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         """Creates and saves a new user."""
@@ -44,6 +57,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    data_version = models.PositiveIntegerField(default=0)
+    data_modified_at = models.DateTimeField(null=True, blank=True)
 
     objects = UserManager()
 
@@ -55,6 +70,9 @@ class Tag(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(get_user_model(), null=True, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [models.Index(fields=['user', 'name'])]
+
     def __str__(self):
         return self.name
     
@@ -64,6 +82,9 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [models.Index(fields=['user', 'name'])]
+
     def __str__(self):
         return self.name
 
@@ -77,8 +98,58 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(null=True, upload_to=recipe_image_file_path,
+                              storage=image_storage, db_index=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'id'])]
 
     def __str__(self):
         return self.title
-    
\ No newline at end of file
+    
+
+class ImageJob(models.Model):
+    """Background processing of an image uploaded to a recipe."""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    recipe = models.ForeignKey(Recipe, related_name='image_jobs',
+                               on_delete=models.CASCADE)
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'updated_at'])]
+
+    def __str__(self):
+        return f'{self.source} ({self.status})'
+
+
+class ImageRendition(models.Model):
+    """Resized, metadata-free copy of a recipe image."""
+    recipe = models.ForeignKey(Recipe, related_name='renditions',
+                               on_delete=models.CASCADE)
+    format = models.CharField(max_length=4)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.ImageField(upload_to=recipe_rendition_file_path,
+                             storage=image_storage, db_index=True)
+
+    class Meta:
+        ordering = 'width', 'format'
+
+    def __str__(self):
+        return self.file.name
@@ -0,0 +1,88 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+                                           SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, TextField
+from django.db.models.functions import Cast
+
+from .models import Ingredient, Recipe, Tag
+
+SEARCH_CONFIG = 'english'
+
+_local = threading.local()
+
+
+def is_supported():
+    """Return True if the database has full-text search."""
+    return connection.vendor == 'postgresql'
+
+
+def _names(model):
+    """Return a subquery of the names of a recipe's tags or ingredients."""
+    # Imported here as the postgres aggregates need psycopg2.
+    from django.contrib.postgres.aggregates import StringAgg
+
+    return Subquery(
+        model.objects.filter(recipe=OuterRef('pk'))
+                     .order_by()
+                     .values('recipe')
+                     .annotate(names=StringAgg('name', ' '))
+                     .values('names'),
+        output_field=TextField(),
+    )
+
+
+def update_search_vectors(recipes):
+    """Recompute the stored search vectors of a queryset of recipes.
+
+    Titles weigh more than tag and ingredient names. Does nothing on
+    databases without full-text search.
+    """
+    if not is_supported():
+        return
+    recipes.update(search_vector=(
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector(_names(Tag), weight='B', config=SEARCH_CONFIG) +
+        SearchVector(_names(Ingredient), weight='B', config=SEARCH_CONFIG)
+    ))
+
+
+def indexing_deferred():
+    """Return whether single recipe saves are left to a bulk update."""
+    return getattr(_local, 'deferred', False)
+
+
+@contextmanager
+def defer_recipe_indexing():
+    """Skip indexing each recipe saved in the block.
+
+    For bulk writes, which index all their recipes at once through
+    bulk_saved afterwards.
+    """
+    previous = indexing_deferred()
+    _local.deferred = True
+    try:
+        yield
+    finally:
+        _local.deferred = previous
+
+
+def search_recipes(queryset, term):
+    """Filter recipes matching term and annotate them with a `rank`.
+
+    Uses the GIN-indexed search vector on PostgreSQL. Elsewhere it falls
+    back to case-insensitive substring matching, with every rank 0.
+    """
+    if not is_supported():
+        related = Recipe.objects.filter(
+            Q(tags__name__icontains=term) |
+            Q(ingredients__name__icontains=term)
+        ).values('pk')
+        return queryset.filter(Q(title__icontains=term) | Q(pk__in=related)) \
+                       .annotate(rank=Cast(0, FloatField()))
+
+    query = SearchQuery(term, config=SEARCH_CONFIG)
+    rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+    return queryset.filter(search_vector=query).annotate(rank=rank)
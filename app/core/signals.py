@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_init, \
+                                     post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import get_token_store
+from .changes import data_changed
+from .models import ImageRendition, Ingredient, Recipe, Tag
+from .search import indexing_deferred, is_supported, \
+                     update_search_vectors
+from .storage import release
+
+# Sent after objects are written with bulk queries, which skip post_save
+# and m2m_changed.
+bulk_saved = Signal(providing_args=['instances'])
+
+
+@receiver(post_delete, sender=Token)
+def uncache_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a token as soon as it's deleted."""
+    get_token_store().delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def uncache_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached tokens of a user whose account changed."""
+    if created:
+        return
+    store = get_token_store()
+    for key in Token.objects.filter(user=instance) \
+                            .values_list('key', flat=True):
+        store.delete(key)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def record_object_change(sender, instance, **kwargs):
+    """Bump the data version of the owner of a saved or deleted object."""
+    data_changed(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def record_relation_change(sender, instance, action, **kwargs):
+    """Bump the data version when tags or ingredients are (un)assigned."""
+    if action.startswith('post_'):
+        data_changed(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def index_saved_recipe(sender, instance, update_fields=None, **kwargs):
+    """Update the search vector of a recipe whose title may have changed."""
+    if indexing_deferred():
+        return
+    if update_fields is None or 'title' in update_fields:
+        update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_relation_change(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Update the search vectors of recipes whose tags or ingredients changed.
+    """
+    if not reverse:
+        if action.startswith('post_'):
+            update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+    elif action == 'pre_clear' and is_supported():
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        update_search_vectors(Recipe.objects.filter(
+            pk__in=instance.__dict__.pop('_cleared_recipe_ids', [])
+        ))
+    elif action.startswith('post_'):
+        update_search_vectors(Recipe.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_renamed_attribute(sender, instance, created, **kwargs):
+    """Update the search vectors of the recipes of a renamed object."""
+    if not created:
+        update_search_vectors(Recipe.objects.filter(
+            pk__in=instance.recipe_set.values('id')
+        ))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_attribute_recipes(sender, instance, **kwargs):
+    """Remember the recipes of an object about to be deleted."""
+    if not is_supported():
+        return
+    instance._deleted_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_deleted_attribute(sender, instance, **kwargs):
+    """Update the search vectors of the recipes of a deleted object."""
+    recipe_ids = instance.__dict__.pop('_deleted_recipe_ids', [])
+    if recipe_ids:
+        update_search_vectors(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+@receiver(bulk_saved, sender=Recipe)
+def index_bulk_saved_recipes(sender, instances, **kwargs):
+    """Update the search vectors of recipes written in bulk."""
+    update_search_vectors(Recipe.objects.filter(
+        pk__in=[instance.pk for instance in instances]
+    ))
+
+
+@receiver(post_init, sender=Recipe)
+def remember_image(sender, instance, **kwargs):
+    """Remember the stored image name to notice when it's replaced."""
+    image = instance.__dict__.get('image')
+    instance._stored_image = getattr(image, 'name', image)
+
+
+@receiver(post_save, sender=Recipe)
+def release_replaced_image(sender, instance, **kwargs):
+    """Release the previous image file of a recipe whose image changed."""
+    previous = instance._stored_image
+    instance._stored_image = instance.image.name
+    if previous and previous != instance.image.name:
+        release(instance.image.storage, previous)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """Release the image file of a deleted recipe."""
+    if instance.image:
+        release(instance.image.storage, instance.image.name)
+
+
+@receiver(post_delete, sender=ImageRendition)
+def release_rendition_file(sender, instance, **kwargs):
+    """Release the file of a deleted rendition."""
+    release(instance.file.storage, instance.file.name)
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage that names files by the SHA-256 of their content.
+
+    Saving content that is already stored writes nothing and returns the
+    existing name, so identical uploads share one file. The directory and
+    extension of the requested name are kept; files are spread over
+    subdirectories named after the first two hex digits of the hash.
+    """
+
+    def content_name(self, name, content):
+        """Return the name content is stored under."""
+        digest = getattr(content, 'sha256', None)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            for chunk in content.chunks():
+                sha256.update(chunk)
+            digest = sha256.hexdigest()
+            content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension) \
+                      .replace('\\', '/')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Refresh the age the garbage collector goes by.
+            os.utime(self.path(name))
+            return name
+        temp_name = self._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temp_name), self.path(name))
+        return name
+
+
+def image_references(name):
+    """Return how many recipes and renditions use the stored file name."""
+    from .models import ImageRendition, Recipe
+
+    return Recipe.objects.filter(image=name).count() + \
+        ImageRendition.objects.filter(file=name).count()
+
+
+def release(storage, name):
+    """Delete a stored file once nothing references it.
+
+    Runs after the current transaction commits. Files touched in the last
+    MEDIA_GC['GRACE_SECONDS'] are kept, as a concurrent upload of the same
+    content may be about to reference them; gc_images removes them later.
+    """
+    def delete():
+        if not name or image_references(name):
+            return
+        try:
+            age = time.time() - os.path.getmtime(storage.path(name))
+        except FileNotFoundError:
+            return
+        if age >= settings.MEDIA_GC['GRACE_SECONDS']:
+            storage.delete(name)
+
+    transaction.on_commit(delete)
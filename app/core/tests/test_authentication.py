@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from core.authentication import CachedTokenAuthentication, \
+                                LocalTokenStore, get_token_store
+
+ME_URL = reverse('user:me')
+
+
+class LocalTokenStoreTests(TestCase):
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used token is evicted first."""
+        store = LocalTokenStore(max_size=2, ttl=60)
+        store.set('a', 1)
+        store.set('b', 2)
+        store.get('a')
+        store.set('c', 3)
+
+        self.assertEqual(store.get('a'), 1)
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('c'), 3)
+
+    @patch('time.monotonic')
+    def test_entries_expire(self, monotonic):
+        """Test entries are dropped after their time to live."""
+        store = LocalTokenStore(max_size=2, ttl=60)
+        monotonic.return_value = 100
+        store.set('a', 1)
+
+        monotonic.return_value = 159
+        self.assertEqual(store.get('a'), 1)
+        monotonic.return_value = 160
+        self.assertIsNone(store.get('a'))
+
+    def test_copies_kept(self):
+        """Test changing a cached object doesn't change the cache."""
+        store = LocalTokenStore(max_size=2, ttl=60)
+        entry = {'name': 'Test'}
+        store.set('a', entry)
+        entry['name'] = 'Changed'
+        store.get('a')['name'] = 'Changed'
+
+        self.assertEqual(store.get('a'), {'name': 'Test'})
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        get_token_store().clear()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.token = Token.objects.create(user=self.user)
+        self.key = self.token.key
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self):
+        """Authenticate with the token and return the user."""
+        user, _ = self.authentication.authenticate_credentials(self.key)
+        return user
+
+    def test_token_cached(self):
+        """Test a token is looked up in the database only once."""
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating."""
+        self.authenticate()
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user's cached token stops authenticating."""
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_password_change_uncaches_token(self):
+        """Test changing the password drops the cached token."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+        response = client.patch(ME_URL, {'password': 'newpass'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(get_token_store().get(self.key))
+
+    @override_settings(TOKEN_AUTH_CACHE={'CACHE_ALIAS': 'default',
+                                         'TTL': 60})
+    def test_shared_cache_backend(self):
+        """Test tokens can be cached in a Django cache backend."""
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
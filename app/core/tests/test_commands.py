@@ -1,23 +1,157 @@
-from unittest.mock import patch
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.db import connection
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.db.backends.postgresql import base
+from core.models import Ingredient, Recipe, Tag
+
 
 class CommandTests(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
+            gi.return_value = MagicMock()
+            call_command('wait_for_db', stdout=StringIO())
             self.assertEqual(gi.call_count, 1)
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """Test waiting for db"""
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
\ No newline at end of file
+            gi.side_effect = [OperationalError] * 5 + [MagicMock()]
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(gi.call_count, 6)
+
+    def test_wait_for_db_runs_query(self):
+        """Test the database is probed with a real query"""
+        connection = MagicMock()
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.return_value = connection
+            call_command('wait_for_db', stdout=StringIO())
+
+        cursor = connection.get_new_connection.return_value.cursor
+        cursor.return_value.execute.assert_called_once_with('SELECT 1')
+        connection.get_new_connection.return_value.close.assert_called_once()
+
+    def test_wait_for_real_db(self):
+        """Test the test database is found ready"""
+        out = StringIO()
+        call_command('wait_for_db', stdout=out)
+
+        self.assertIn('Database "default" ready', out.getvalue())
+
+    def test_wait_for_pooled_db(self):
+        """Test probes bypass the pool and keep their connect timeout"""
+        wrapper = base.DatabaseWrapper(
+            dict(connection.settings_dict, POOL={'MAX_SIZE': 2}),
+            alias='pooled',
+        )
+        self.addCleanup(base.close_pools)
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi, \
+                patch.object(base.Database, 'connect',
+                             wraps=base.Database.connect) as connect:
+            gi.return_value = wrapper
+            call_command('wait_for_db', connect_timeout=3,
+                         stdout=StringIO())
+
+        self.assertEqual(connect.call_args[1]['connect_timeout'], 3)
+        self.assertEqual(wrapper.pool.stats(), {'in_use': 0, 'idle': 0})
+
+    @patch('random.uniform', side_effect=lambda low, high: high)
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_backoff(self, ts, uniform):
+        """Test the delay doubles after each failure up to a maximum"""
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.side_effect = [OperationalError] * 5 + [MagicMock()]
+            call_command('wait_for_db', initial_delay=1, max_delay=5,
+                         stdout=StringIO())
+
+        self.assertEqual([call[0][0] for call in ts.call_args_list],
+                         [1, 2, 4, 5, 5])
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """Test waiting gives up after the timeout"""
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.side_effect = OperationalError('refused')
+            with self.assertRaises(CommandError) as context:
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+        self.assertIn('refused', str(context.exception))
+
+    def test_wait_for_several_databases(self):
+        """Test every given alias is probed"""
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.return_value = MagicMock()
+            out = StringIO()
+            call_command('wait_for_db', '--database', 'default',
+                         '--database', 'replica', stdout=out)
+
+        self.assertEqual(sorted(call[0][0] for call in gi.call_args_list),
+                         ['default', 'replica'])
+        self.assertIn('Database "replica" ready', out.getvalue())
+
+
+class SeedRecipesCommandTests(TestCase):
+
+    def seed(self, **options):
+        call_command('seed_recipes', users=3, recipes=20, tags=10,
+                     ingredients=50, stdout=StringIO(), **options)
+
+    def recipe_names(self):
+        """Return the titles, tags and ingredients of every recipe."""
+        return [
+            (recipe.title,
+             sorted(tag.name for tag in recipe.tags.all()),
+             sorted(ingredient.name
+                    for ingredient in recipe.ingredients.all()))
+            for recipe in Recipe.objects.order_by('user__email', 'id')
+            .prefetch_related('tags', 'ingredients')
+        ]
+
+    def test_seed_recipes(self):
+        """Test users are created with their recipes and attributes"""
+        self.seed()
+
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Recipe.objects.count(), 60)
+        for recipe in Recipe.objects.annotate(tag_count=Count('tags')):
+            self.assertGreaterEqual(recipe.tag_count, 1)
+            self.assertEqual(recipe.tags.exclude(user=recipe.user).count(), 0)
+        self.assertTrue(get_user_model().objects.first()
+                        .check_password('seedpass'))
+
+    def test_seed_recipes_deterministic(self):
+        """Test the same options create the same data"""
+        self.seed()
+        first = self.recipe_names()
+
+        self.seed(clear=True)
+
+        self.assertEqual(self.recipe_names(), first)
+        self.assertEqual(get_user_model().objects.count(), 3)
+
+    def test_seed_recipes_skewed(self):
+        """Test a few names are on many recipes and most on few"""
+        self.seed()
+
+        counts = sorted(Ingredient.objects.values('name')
+                        .annotate(uses=Count('recipe'))
+                        .values_list('uses', flat=True), reverse=True)
+        self.assertGreater(counts[0], 5 * counts[len(counts) // 2])
+        self.assertEqual(Tag.objects.filter(name='vegan').count(), 3)
+
+    def test_seed_recipes_refuses_twice(self):
+        """Test seeding again without --clear fails"""
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
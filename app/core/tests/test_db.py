@@ -0,0 +1,140 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.db.backends.postgresql.base import DatabaseWrapper, close_pools
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        self.opened.append(FakeConnection())
+        return self.opened[-1]
+
+    def test_reuses_released_connections(self):
+        """Test a released connection is handed out again."""
+        pool = ConnectionPool(self.connect)
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(first.rollbacks, 1)
+
+    def test_blocks_when_full(self):
+        """Test acquire waits for a release once max_size are out."""
+        pool = ConnectionPool(self.connect, max_size=1, timeout=5)
+        first = pool.acquire()
+        threading.Timer(0.05, pool.release, [first]).start()
+
+        self.assertIs(pool.acquire(), first)
+
+    def test_times_out_when_full(self):
+        """Test acquire gives up after timeout seconds."""
+        pool = ConnectionPool(self.connect, max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_closes_idle_connections(self):
+        """Test connections idle past idle_timeout are closed to min_size."""
+        pool = ConnectionPool(self.connect, min_size=1, idle_timeout=60)
+        connections = [pool.acquire() for _ in range(3)]
+        for conn in connections:
+            pool.release(conn)
+
+        with mock.patch('core.db.pool.time.monotonic',
+                        return_value=pool.idle[-1][1] + 61):
+            conn = pool.acquire()
+
+        self.assertEqual([c.closed for c in connections], [1, 1, 0])
+        self.assertIs(conn, connections[2])
+        self.assertEqual(pool.size, 1)
+
+    def test_replaces_bad_connections(self):
+        """Test connections failing the check are closed and replaced."""
+        pool = ConnectionPool(self.connect)
+        first = pool.acquire()
+        pool.release(first)
+
+        second = pool.acquire(check=lambda conn: False)
+
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.size, 1)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a connection that can't be opened doesn't take a slot."""
+        pool = ConnectionPool(mock.Mock(side_effect=OSError), max_size=1)
+
+        with self.assertRaises(OSError):
+            pool.acquire()
+        self.assertEqual(pool.size, 0)
+
+
+class DatabaseWrapperTests(TestCase):
+
+    def wrapper(self, **settings):
+        wrapper = DatabaseWrapper(dict(connection.settings_dict, **settings),
+                                  alias='test_wrapper')
+        self.addCleanup(close_pools)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def backend_pid(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+    def test_pool_reuses_connections(self):
+        """Test closing a pooled connection keeps it open for reuse."""
+        wrapper = self.wrapper(POOL={'MAX_SIZE': 2})
+        pid = self.backend_pid(wrapper)
+        wrapper.close()
+
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(self.backend_pid(wrapper), pid)
+
+    def test_health_check_reconnects(self):
+        """Test a dead persistent connection is replaced on the next request.
+        """
+        wrapper = self.wrapper(CONN_HEALTH_CHECKS=True, CONN_MAX_AGE=60)
+        pid = self.backend_pid(wrapper)
+        wrapper.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+
+        self.assertNotEqual(self.backend_pid(wrapper), pid)
+
+    def test_health_check_once_per_request(self):
+        """Test the connection is checked before its first query only."""
+        wrapper = self.wrapper(CONN_HEALTH_CHECKS=True, CONN_MAX_AGE=60)
+        self.backend_pid(wrapper)
+        wrapper.close_if_unusable_or_obsolete()
+
+        with mock.patch.object(wrapper, 'is_usable',
+                               return_value=True) as is_usable:
+            self.backend_pid(wrapper)
+            self.backend_pid(wrapper)
+
+        self.assertEqual(is_usable.call_count, 1)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+TOKEN_URL = reverse('user:token')
+
+HASHING = {
+    'ARGON2_TIME_COST': 1,
+    'ARGON2_MEMORY_COST': 64,
+    'ARGON2_PARALLELISM': 1,
+    'BCRYPT_ROUNDS': 4,
+}
+
+
+@override_settings(PASSWORD_HASHING=HASHING, PASSWORD_HASHERS=[
+    'core.hashers.TunedArgon2PasswordHasher',
+    'core.hashers.TunedBCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+])
+class TunedHasherTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'email': 'test@google.com', 'password': 'testpass'}
+
+    def create_user(self, hasher):
+        """Create a user whose password was hashed by hasher."""
+        with self.settings(PASSWORD_HASHERS=[hasher]):
+            return get_user_model().objects.create_user(**self.payload)
+
+    def login(self, user):
+        """Log in through the API and return the user's new hash."""
+        response = self.client.post(TOKEN_URL, self.payload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        return user.password
+
+    def test_hashes_with_configured_cost(self):
+        """Test new passwords are hashed with the configured costs."""
+        user = get_user_model().objects.create_user(**self.payload)
+
+        self.assertTrue(user.password.startswith('argon2$argon2i$'))
+        self.assertIn('$m=64,t=1,p=1$', user.password)
+
+    def test_rehash_on_login(self):
+        """Test a login rehashes passwords of another hasher."""
+        user = self.create_user(
+            'django.contrib.auth.hashers.MD5PasswordHasher'
+        )
+
+        password = self.login(user)
+
+        self.assertEqual(identify_hasher(password).algorithm, 'argon2')
+        self.assertTrue(user.check_password(self.payload['password']))
+
+    def test_rehash_on_cost_change(self):
+        """Test a login rehashes passwords made with an old cost."""
+        user = get_user_model().objects.create_user(**self.payload)
+
+        with self.settings(PASSWORD_HASHING=dict(HASHING,
+                                                 ARGON2_TIME_COST=2)):
+            password = self.login(user)
+
+        self.assertIn('$m=64,t=2,p=1$', password)
+
+    def test_bcrypt_rounds(self):
+        """Test bcrypt hashes use the configured rounds."""
+        user = self.create_user(
+            'core.hashers.TunedBCryptSHA256PasswordHasher'
+        )
+
+        self.assertTrue(user.password.startswith('bcrypt_sha256$$2b$04$'))
@@ -0,0 +1,119 @@
+from prometheus_client import REGISTRY
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import get_token_store
+from core.db.pool import ConnectionPool
+from core.metrics import PrometheusSink, update_pool_gauges
+from core.tests.test_db import FakeConnection
+
+METRICS_URL = reverse('metrics')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class MetricsTestMixin:
+
+    def value(self, name, **labels):
+        """Return the current value of a metric sample."""
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsEndpointTests(MetricsTestMixin, TestCase):
+
+    def setUp(self):
+        get_token_store().clear()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_requests_counted_by_route(self):
+        """Test requests and their latency are recorded by URL name."""
+        labels = {'route': 'recipe:tag-list', 'method': 'GET'}
+        requests = self.value('http_requests_total', status='200', **labels)
+        timed = self.value('http_request_duration_seconds_count', **labels)
+
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(self.value('http_requests_total', status='200',
+                                    **labels), requests + 1)
+        self.assertEqual(self.value('http_request_duration_seconds_count',
+                                    **labels), timed + 1)
+
+    def test_metrics_exposed(self):
+        """Test the metrics are served in the Prometheus text format."""
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'http_requests_total{', res.content)
+        self.assertIn(b'route="recipe:tag-list"', res.content)
+
+    @override_settings(METRICS={'TOKEN': 'secret'})
+    def test_token_required(self):
+        """Test scrapers must send the token once one is configured."""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 401)
+
+        res = self.client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
+
+    def test_token_cache_counted(self):
+        """Test token cache lookups are counted as hits and misses."""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        misses = self.value('cache_requests_total', cache='token',
+                            result='miss')
+        hits = self.value('cache_requests_total', cache='token',
+                          result='hit')
+
+        client.get(TAGS_URL)
+        client.get(TAGS_URL)
+
+        self.assertEqual(self.value('cache_requests_total', cache='token',
+                                    result='miss'), misses + 1)
+        self.assertEqual(self.value('cache_requests_total', cache='token',
+                                    result='hit'), hits + 1)
+
+
+class MetricsTests(MetricsTestMixin, SimpleTestCase):
+
+    def test_pool_gauges(self):
+        """Test pool gauges show connections in use and idle."""
+        pool = ConnectionPool(FakeConnection, max_size=5)
+        pool.release(pool.acquire())
+        pool.acquire()
+        pool.acquire()
+
+        update_pool_gauges([('pooled', pool)])
+
+        self.assertEqual(self.value('db_pool_connections', alias='pooled',
+                                    state='in_use'), 2)
+        self.assertEqual(self.value('db_pool_connections', alias='pooled',
+                                    state='idle'), 0)
+        self.assertEqual(self.value('db_pool_max_connections',
+                                    alias='pooled'), 5)
+
+    def test_prometheus_sink(self):
+        """Test samples feed the query histograms of their route."""
+        route = 'recipe:recipe-list'
+        queries = self.value('http_request_queries_sum', route=route)
+        duplicates = self.value('http_request_duplicate_queries_total',
+                                route=route)
+
+        PrometheusSink().record({'view': route, 'queries': 12,
+                                 'duplicate_queries': 9, 'db_ms': 4.0})
+
+        self.assertEqual(self.value('http_request_queries_sum', route=route),
+                         queries + 12)
+        self.assertEqual(self.value('http_request_duplicate_queries_total',
+                                    route=route), duplicates + 9)
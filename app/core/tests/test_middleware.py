@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.middleware import QueryRecorder
+from core.models import Tag
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class MemorySink:
+    """Sink keeping the samples it is given."""
+    samples = []
+
+    def record(self, sample):
+        self.samples.append(sample)
+
+
+class FailingSink:
+
+    def record(self, sample):
+        raise RuntimeError('Sink is down')
+
+
+def metrics_settings(**options):
+    """Return REQUEST_METRICS sampling every request into MemorySink."""
+    return dict({
+        'SAMPLE_RATE': 1,
+        'SERVER_TIMING': True,
+        'SINKS': ['core.tests.test_middleware.MemorySink'],
+    }, **options)
+
+
+@override_settings(REQUEST_METRICS=metrics_settings())
+class RequestMetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        MemorySink.samples = []
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_request_sampled(self):
+        """Test a sampled request reports its view, queries and timings."""
+        res = self.client.get(TAGS_URL)
+
+        sample, = MemorySink.samples
+        self.assertEqual(sample['view'], 'recipe:tag-list')
+        self.assertEqual(sample['action'], 'list')
+        self.assertEqual(sample['status'], 200)
+        self.assertGreater(sample['queries'], 0)
+        for timing in ('db_ms', 'view_ms', 'render_ms', 'total_ms'):
+            self.assertIn(timing, sample)
+        self.assertTrue(res['Server-Timing'].startswith('db;dur='))
+        self.assertIn('render;dur=', res['Server-Timing'])
+
+    def test_action_of_method(self):
+        """Test the action is the one the request method maps to."""
+        self.client.post(TAGS_URL, {'name': 'Dessert'})
+
+        self.assertEqual(MemorySink.samples[0]['action'], 'create')
+
+    @override_settings(REQUEST_METRICS=metrics_settings(SAMPLE_RATE=0))
+    def test_unsampled_request_untouched(self):
+        """Test requests outside the sample aren't measured."""
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(MemorySink.samples, [])
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(REQUEST_METRICS=metrics_settings(SERVER_TIMING=False))
+    def test_server_timing_optional(self):
+        """Test samples can be kept from clients."""
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(len(MemorySink.samples), 1)
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(REQUEST_METRICS=metrics_settings(SINKS=[
+        'core.tests.test_middleware.FailingSink',
+        'core.tests.test_middleware.MemorySink',
+    ]))
+    def test_failing_sink_skipped(self):
+        """Test a failing sink neither fails the request nor the others."""
+        with self.assertLogs('core.metrics', 'ERROR'):
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(MemorySink.samples), 1)
+
+
+class QueryRecorderTests(TestCase):
+
+    def test_repeated_statements_counted(self):
+        """Test statements run more than once are counted as repeats."""
+        user = get_user_model().objects.create_user('test@google.com',
+                                                    'testpass')
+        tags = [Tag.objects.create(user=user, name=name)
+                for name in ('Vegan', 'Dessert')]
+        recorder = QueryRecorder()
+
+        with connection.execute_wrapper(recorder):
+            for tag in tags:
+                Tag.objects.get(pk=tag.pk)
+            Tag.objects.count()
+
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(len(recorder.statements), 2)
+        self.assertEqual(recorder.statements.most_common(1)[0][1], 2)
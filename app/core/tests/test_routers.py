@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, router
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.routers import is_pinned, set_read_alias
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+ME_URL = reverse('user:me')
+
+ROUTING = {'REPLICAS': ['replica'], 'PIN_SECONDS': 10,
+           'CACHE_ALIAS': 'default'}
+
+
+class ReplicaMixin:
+    """Add a "replica" alias connected to the test database."""
+
+    def setUp(self):
+        super().setUp()
+        connections.databases['replica'] = dict(
+            connections['default'].settings_dict
+        )
+        self.addCleanup(self.remove_replica)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def remove_replica(self):
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+
+    def queries(self, alias, request):
+        """Return how many queries request() runs on alias."""
+        with CaptureQueriesContext(connections[alias]) as context:
+            request()
+        return len(context.captured_queries)
+
+
+@override_settings(DATABASE_ROUTING=ROUTING)
+class ReplicaRouterTests(ReplicaMixin, TestCase):
+
+    def tearDown(self):
+        set_read_alias(None)
+
+    def test_reads_primary_by_default(self):
+        """Test reads outside of replica views use the primary."""
+        self.assertEqual(router.db_for_read(Recipe), 'default')
+
+    def test_reads_chosen_replica(self):
+        """Test reads go to the replica the request picked."""
+        set_read_alias('replica')
+
+        self.assertEqual(router.db_for_read(Recipe), 'replica')
+
+    def test_writes_primary(self):
+        """Test instances read from a replica are saved to the primary."""
+        user = get_user_model().objects.create_user('test@google.com',
+                                                    'testpass')
+        instance = get_user_model()(pk=user.pk)
+        instance._state.db = 'replica'
+
+        self.assertEqual(router.db_for_write(Recipe, instance=instance),
+                         'default')
+
+    def test_no_migrations_on_replicas(self):
+        """Test migrations only run on the primary."""
+        self.assertFalse(router.allow_migrate('replica', 'core'))
+        self.assertTrue(router.allow_migrate('default', 'core'))
+
+
+@override_settings(DATABASE_ROUTING=ROUTING)
+class ReplicaReadApiTests(ReplicaMixin, TransactionTestCase):
+    """Test which database API requests read from."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_safe_requests_read_replica(self):
+        """Test list GETs don't query the primary."""
+        Recipe.objects.create(user=self.user, title='Borscht', time=5,
+                              price=25)
+
+        for url in RECIPES_URL, TAGS_URL:
+            primary = self.queries(
+                'default', lambda: self.client.get(url)
+            )
+            self.assertEqual(primary, 0)
+            cache.clear()
+            self.assertGreater(
+                self.queries('replica', lambda: self.client.get(url)), 0
+            )
+
+    def test_writes_pin_user_to_primary(self):
+        """Test a user reads their own write after creating a recipe."""
+        response = self.client.post(RECIPES_URL, {
+            'title': 'Borscht', 'time': 5, 'price': 25,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned(self.user.pk))
+
+        replica = self.queries('replica', lambda: self.client.get(
+            RECIPES_URL
+        ))
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(replica, 0)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_pin_expires(self):
+        """Test reads go back to the replica once the pin is gone."""
+        self.client.patch(ME_URL, {'name': 'New name'})
+        self.assertTrue(is_pinned(self.user.pk))
+        cache.clear()
+
+        self.assertEqual(
+            self.queries('default', lambda: self.client.get(RECIPES_URL)), 0
+        )
+
+    def test_without_replicas(self):
+        """Test everything reads the primary when no replica is set up."""
+        with override_settings(DATABASE_ROUTING=dict(ROUTING, REPLICAS=[])):
+            replica = self.queries('replica', lambda: self.client.get(
+                RECIPES_URL
+            ))
+            self.client.post(RECIPES_URL, {
+                'title': 'Borscht', 'time': 5, 'price': 25,
+            })
+
+        self.assertEqual(replica, 0)
+        self.assertFalse(is_pinned(self.user.pk))
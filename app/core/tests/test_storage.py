@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import Recipe, image_storage
+from core.tests.utils import MediaRootMixin
+
+
+class ContentAddressedStorageTests(MediaRootMixin, TestCase):
+
+    def test_named_by_content(self):
+        """Test files are named after the hash of their content."""
+        name = image_storage.save('uploads/recipe/a.JPG', ContentFile(b'x'))
+
+        self.assertEqual(
+            name,
+            'uploads/recipe/2d/2d711642b726b04401627ca9fbac32f5c8530fb1903cc4'
+            'db02258717921a4881.jpg',
+        )
+        self.assertEqual(self.stored_files(), [name])
+
+    def test_identical_content_stored_once(self):
+        """Test saving the same content twice keeps a single file."""
+        first = image_storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        second = image_storage.save('uploads/recipe/b.jpg',
+                                    ContentFile(b'x'))
+        third = image_storage.save('uploads/recipe/c.jpg', ContentFile(b'y'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual(self.stored_files(), sorted([first, third]))
+
+
+@override_settings(MEDIA_GC={'GRACE_SECONDS': 0})
+class ImageReferenceTests(MediaRootMixin, TransactionTestCase):
+    """Test image files are deleted once no recipe uses them."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+
+    def recipe_with_image(self, content):
+        recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                       time=5, price=25)
+        recipe.image.save('photo.jpg', ContentFile(content))
+        return recipe
+
+    def test_replaced_image_deleted(self):
+        """Test replacing an image deletes the unused old file."""
+        recipe = self.recipe_with_image(b'old')
+        old = recipe.image.name
+
+        recipe.image.save('photo.jpg', ContentFile(b'new'))
+
+        self.assertEqual(self.stored_files(), [recipe.image.name])
+        self.assertNotEqual(recipe.image.name, old)
+
+    def test_shared_image_kept(self):
+        """Test a file is kept while another recipe still uses it."""
+        recipe1 = self.recipe_with_image(b'same')
+        recipe2 = self.recipe_with_image(b'same')
+        self.assertEqual(recipe1.image.name, recipe2.image.name)
+
+        recipe1.image.save('photo.jpg', ContentFile(b'new'))
+        self.assertIn(recipe2.image.name, self.stored_files())
+
+        recipe2.delete()
+        self.assertEqual(self.stored_files(), [recipe1.image.name])
+
+    @override_settings(MEDIA_GC={'GRACE_SECONDS': 60})
+    def test_recent_files_left_to_gc(self):
+        """Test files touched within the grace period aren't deleted."""
+        recipe = self.recipe_with_image(b'old')
+        old = recipe.image.name
+
+        recipe.image.save('photo.jpg', ContentFile(b'new'))
+
+        self.assertIn(old, self.stored_files())
@@ -0,0 +1,182 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.throttling import LocalCounterStore, SharedCounterStore, \
+                            get_counter_store
+
+RATES = {'auth': '2/minute', 'user': '5/minute', 'write': '2/minute',
+         'upload': '1/minute'}
+
+
+class CounterStoreTestsMixin:
+    """Tests every counter store has to pass."""
+
+    def get_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        patcher = patch('time.time', return_value=6000)
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = self.get_store()
+
+    def test_limit_enforced(self):
+        """Test requests over the limit are refused until the window ends."""
+        self.assertIsNone(self.store.hit('a', 2, 60))
+        self.assertIsNone(self.store.hit('a', 2, 60))
+        self.assertEqual(self.store.hit('a', 2, 60), 60)
+        self.assertIsNone(self.store.hit('b', 2, 60))
+
+    def test_previous_window_weighted(self):
+        """Test the previous window counts by how much it overlaps."""
+        self.store.hit('a', 2, 60)
+        self.store.hit('a', 2, 60)
+
+        self.time.return_value = 6075
+        self.assertIsNone(self.store.hit('a', 2, 60))
+        self.assertEqual(self.store.hit('a', 2, 60), 15)
+        self.time.return_value = 6091
+        self.assertIsNone(self.store.hit('a', 2, 60))
+
+    def test_old_windows_forgotten(self):
+        """Test counts older than the previous window are dropped."""
+        self.store.hit('a', 1, 60)
+
+        self.time.return_value = 6120
+        self.assertIsNone(self.store.hit('a', 1, 60))
+
+
+class LocalCounterStoreTests(CounterStoreTestsMixin, TestCase):
+
+    def get_store(self):
+        return LocalCounterStore(max_size=100)
+
+    def test_expired_keys_evicted(self):
+        """Test keys are dropped once their windows are over."""
+        self.store.hit('a', 1, 60)
+        self.store.hit('b', 1, 60)
+
+        self.time.return_value = 6120
+        self.store.hit('c', 1, 60)
+
+        self.assertEqual(len(self.store), 1)
+
+    def test_size_bounded(self):
+        """Test the least recently used key goes once the store is full."""
+        store = LocalCounterStore(max_size=2)
+        store.hit('a', 1, 60)
+        store.hit('b', 1, 60)
+        store.hit('c', 1, 60)
+
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.hit('a', 1, 60))
+
+
+class SharedCounterStoreTests(CounterStoreTestsMixin, TestCase):
+
+    def get_store(self):
+        cache.clear()
+        return SharedCounterStore('default')
+
+    def test_counters_shared(self):
+        """Test stores on the same cache share their counters."""
+        self.store.hit('a', 1, 60)
+
+        self.assertEqual(SharedCounterStore('default').hit('a', 1, 60), 60)
+
+
+@override_settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK,
+                                       DEFAULT_THROTTLE_RATES=RATES))
+class ThrottledApiTests(TestCase):
+
+    def setUp(self):
+        get_counter_store().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+
+    def test_auth_throttled_per_address(self):
+        """Test logins are limited per client address."""
+        payload = {'email': 'test@google.com', 'password': 'testpass'}
+        for _ in range(2):
+            res = self.client.post(reverse('user:token'), payload)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(reverse('user:create'), {
+            'email': 'other@google.com', 'password': 'testpass',
+            'name': 'Other',
+        })
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+        res = self.client.post(reverse('user:token'), payload,
+                               REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_forwarded_for_ignored(self):
+        """Test a new X-Forwarded-For on each login doesn't reset the limit.
+        """
+        payload = {'email': 'test@google.com', 'password': 'testpass'}
+        statuses = [
+            self.client.post(reverse('user:token'), payload,
+                             HTTP_X_FORWARDED_FOR=f'10.0.1.{index}')
+            .status_code
+            for index in range(4)
+        ]
+
+        self.assertEqual(statuses, [status.HTTP_200_OK] * 2 +
+                         [status.HTTP_429_TOO_MANY_REQUESTS] * 2)
+
+    def test_writes_throttled_per_user(self):
+        """Test writes have a lower limit than reads, per user."""
+        other = get_user_model().objects.create_user('other@google.com',
+                                                     'testpass')
+        url = reverse('recipe:tag-list')
+        self.client.force_authenticate(self.user)
+        for name in ('Vegan', 'Dessert'):
+            res = self.client.post(url, {'name': name})
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(url, {'name': 'Breakfast'})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(other)
+        res = self.client.post(url, {'name': 'Breakfast'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_reads_throttled_per_user(self):
+        """Test every request counts against the user's limit."""
+        url = reverse('recipe:ingredient-list')
+        self.client.force_authenticate(self.user)
+        for _ in range(5):
+            self.client.get(url)
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_image_upload_scoped(self):
+        """Test image uploads have their own limit."""
+        recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                       time=5, price=25)
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        self.client.force_authenticate(self.user)
+        res = self.client.post(url, {'image': 'notimage'},
+                               format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(url, {'image': 'notimage'},
+                               format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """TestCase mixin with assertions about the queries a request runs."""
+
+    def assertConstantQueries(self, add_rows, request, sizes=(1, 5, 25)):
+        """Assert that request() runs the same number of queries at any size.
+
+        add_rows(count) is called before each measurement and must add
+        `count` more rows to whatever request() returns.
+        """
+        counts = []
+        for size in sizes:
+            add_rows(size)
+            with CaptureQueriesContext(connection) as context:
+                request()
+            counts.append(len(context.captured_queries))
+
+        self.assertEqual(
+            len(set(counts)), 1,
+            f'Query count grows with the number of rows: '
+            f'{dict(zip(sizes, counts))}'
+        )
+        return counts[0]
+
+
+class MediaRootMixin:
+    """TestCase mixin that stores files in a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+    def stored_files(self):
+        """Return the names of every file under MEDIA_ROOT."""
+        return sorted(
+            os.path.relpath(os.path.join(path, name), self.media_root)
+            for path, _, names in os.walk(self.media_root) for name in names
+        )
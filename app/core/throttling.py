@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle, \
+                                     SimpleRateThrottle, UserRateThrottle
+
+
+def estimate(previous, current, elapsed, duration):
+    """Return the requests made over the last duration seconds.
+
+    Requests of the previous window are assumed to be spread evenly over
+    it, so only the share that still falls in the sliding window counts.
+    """
+    return previous * (duration - elapsed) / duration + current
+
+
+def wait_time(previous, current, elapsed, limit, duration):
+    """Return the seconds until the estimate drops below limit."""
+    if current < limit:
+        return max(0, duration - elapsed - (limit - current) / previous *
+                   duration)
+    return duration - elapsed + (1 - limit / current) * duration
+
+
+class LocalCounterStore:
+    """In-process sliding window counters.
+
+    Each key keeps its window and the counts of that window and the one
+    before, so memory doesn't grow with the limit. Keys are kept in least
+    recently used order: expired keys at the old end are dropped on every
+    hit, and the oldest key once there are more than max_size.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, duration):
+        """Count a request against key unless it is over limit.
+
+        Returns None if the request is allowed, otherwise the seconds to
+        wait before the next one will be.
+        """
+        now = time.time()
+        window, elapsed = divmod(now, duration)
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < window - 1:
+                previous, current = 0, 0
+            elif entry[0] == window - 1:
+                previous, current = entry[3], 0
+            else:
+                _, _, previous, current = entry
+            wait = None
+            if estimate(previous, current, elapsed, duration) < limit:
+                current += 1
+            else:
+                wait = wait_time(previous, current, elapsed, limit, duration)
+            expires = (window + 2) * duration
+            self._entries[key] = (window, expires, previous, current)
+            return wait
+
+    def _evict(self, now):
+        """Drop expired keys, and the oldest ones beyond max_size."""
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[1] > now and len(self._entries) < self.max_size:
+                break
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drop every counter."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedCounterStore:
+    """Sliding window counters kept in one of Django's cache backends.
+
+    Every process using the backend shares the counters. Each key takes
+    one cache entry per window, which expires when the next window ends.
+    Increments are atomic with Redis and memcached.
+    """
+    key_prefix = 'throttle:'
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def hit(self, key, limit, duration):
+        now = time.time()
+        window, elapsed = divmod(now, duration)
+        keys = [f'{self.key_prefix}{key}:{int(window) - 1}',
+                f'{self.key_prefix}{key}:{int(window)}']
+        counts = self.cache.get_many(keys)
+        previous, current = (counts.get(key, 0) for key in keys)
+        if estimate(previous, current, elapsed, duration) >= limit:
+            return wait_time(previous, current, elapsed, limit, duration)
+        try:
+            self.cache.incr(keys[1])
+        except ValueError:
+            if not self.cache.add(keys[1], 1, 2 * duration):
+                self.cache.incr(keys[1])
+        return None
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+
+
+def get_counter_store():
+    """Return the counter store configured by settings.THROTTLE_STORE."""
+    global _store
+    if _store is None:
+        options = settings.THROTTLE_STORE
+        if options.get('CACHE_ALIAS'):
+            _store = SharedCounterStore(options['CACHE_ALIAS'])
+        else:
+            _store = LocalCounterStore(options['MAX_SIZE'])
+    return _store
+
+
+@receiver(setting_changed)
+def reset_counter_store(setting, **kwargs):
+    """Rebuild the counter store when its settings change in tests."""
+    global _store
+    if setting in ('THROTTLE_STORE', 'CACHES'):
+        _store = None
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Rate throttle counting requests in the configured counter store.
+
+    Unlike SimpleRateThrottle, which stores the time of every request in
+    the window, it costs the same few bytes per key whatever the rate.
+    """
+
+    @property
+    def THROTTLE_RATES(self):
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.wait_seconds = get_counter_store().hit(
+            self.key, self.num_requests, self.duration
+        )
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthThrottle(SlidingWindowThrottle):
+    """Limit sign ups and logins per client address."""
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class UserThrottle(UserRateThrottle, SlidingWindowThrottle):
+    """Limit every request per user, or per address when anonymous."""
+
+
+class WriteThrottle(UserThrottle):
+    """Limit requests that change data per user."""
+    scope = 'write'
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
+
+
+class ScopedThrottle(ScopedRateThrottle, SlidingWindowThrottle):
+    """Limit requests per user to views or actions with a throttle_scope."""
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import exposition
+
+
+def metrics(request):
+    """Expose the metrics of every worker to Prometheus.
+
+    With METRICS['TOKEN'] set, scrapers have to send it as a bearer token.
+    """
+    token = settings.METRICS['TOKEN']
+    if token and not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    content, content_type = exposition()
+    return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,17 @@
+from django.urls import path, include
+
+from rest_framework.routers import DefaultRouter
+
+from .async_views import AsyncRecipeViewSet
+from .views import TagViewSet, IngredientViewSet
+
+router = DefaultRouter()
+router.register('tags', TagViewSet)
+router.register('ingredients', IngredientViewSet)
+router.register('recipes', AsyncRecipeViewSet)
+
+app_name = 'recipe'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
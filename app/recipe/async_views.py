@@ -0,0 +1,94 @@
+"""Variants of the recipe views for the ASGI application.
+
+Django 2.1 has neither async views nor an async ORM. Under ASGI every
+view runs on one of the application's request threads, so a slow query
+only holds up its own request; the recipe views here also fetch their
+recipes' tags and ingredients concurrently, each on its own thread and
+connection, instead of one after the other.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import Prefetch, prefetch_related_objects
+
+from core.db.routers import get_read_alias, set_read_alias
+from core.models import Tag, Ingredient
+from .views import RecipeViewSet
+
+_executor = None
+
+
+def get_query_executor():
+    """Return the threads concurrent queries run on."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(settings.ASGI_THREADS['QUERIES'],
+                                       thread_name_prefix='asgi-query')
+    return _executor
+
+
+def _prefetch(instances, lookup, read_alias):
+    """Prefetch one lookup, from the replica the request reads from.
+
+    The thread's connections are closed afterwards, or returned to the
+    pool, so idle query threads don't hold any.
+    """
+    set_read_alias(read_alias)
+    try:
+        prefetch_related_objects(instances, lookup)
+    finally:
+        set_read_alias(None)
+        connections.close_all()
+
+
+def prefetch_concurrently(instances, *lookups):
+    """Run prefetch_related_objects() for each of lookups at the same time.
+    """
+    if not instances:
+        return
+    for instance in instances:
+        # Two threads creating the cache at once would lose one's results.
+        if not hasattr(instance, '_prefetched_objects_cache'):
+            instance._prefetched_objects_cache = {}
+    prefetch = sync_to_async(_prefetch, thread_sensitive=False,
+                             executor=get_query_executor())
+    read_alias = get_read_alias()
+
+    async def prefetch_all():
+        await asyncio.gather(*(prefetch(instances, lookup, read_alias)
+                               for lookup in lookups))
+
+    async_to_sync(prefetch_all)()
+
+
+class AsyncRecipeViewSet(RecipeViewSet):
+    """RecipeViewSet fetching tags and ingredients concurrently."""
+
+    def _concurrent_lookups(self):
+        """Return the lookups to prefetch concurrently for this action."""
+        if self.action == 'list':
+            return (
+                Prefetch('ingredients',
+                         queryset=Ingredient.objects.only('id')),
+                Prefetch('tags', queryset=Tag.objects.only('id')),
+            )
+        if self.action == 'retrieve':
+            return 'ingredients', 'tags'
+        return ()
+
+    def _with_related(self, queryset):
+        if self._concurrent_lookups():
+            return queryset
+        return super()._with_related(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        lookups = self._concurrent_lookups()
+        if args and lookups:
+            many = kwargs.get('many', False)
+            instances = list(args[0]) if many else [args[0]]
+            prefetch_concurrently(instances, *lookups)
+            args = (instances if many else instances[0],) + args[1:]
+        return super().get_serializer(*args, **kwargs)
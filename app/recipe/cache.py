@@ -0,0 +1,93 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.response import Response
+
+from core.changes import get_data_version
+from core.metrics import CACHE_REQUESTS
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def record(basename, outcome):
+    """Count a cache hit or miss of a list endpoint."""
+    with _stats_lock:
+        _stats[(basename, outcome)] += 1
+    CACHE_REQUESTS.labels(f'list:{basename}', outcome).inc()
+
+
+def get_cache_stats():
+    """Return {endpoint basename: {'hit': n, 'miss': n}} for this process."""
+    with _stats_lock:
+        stats = {}
+        for (basename, outcome), count in _stats.items():
+            stats.setdefault(basename, {'hit': 0, 'miss': 0})[outcome] = count
+        return stats
+
+
+def reset_cache_stats():
+    """Zero the hit and miss counters."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def _normalize(value):
+    """Return a canonical form of a query parameter value."""
+    ids = value.split(',')
+    if all(pk.strip().isdigit() for pk in ids):
+        return ','.join(str(pk) for pk in sorted({int(pk) for pk in ids}))
+    return value
+
+
+class ListCacheMixin:
+    """Cache the serialized data of list responses per user.
+
+    Entries are keyed by user, data version, endpoint and the normalized
+    query parameters the list depends on. A write bumps the user's data
+    version from a signal handler, so stale entries are never read again
+    and expire after RESPONSE_CACHE['TIMEOUT'].
+    """
+    list_cache_params = (
+        'assigned_only', 'counts', 'cursor', 'ingredients', 'match',
+        'page_size', 'paginate', 'search', 'tags',
+    )
+    list_cache_flags = 'assigned_only', 'counts'
+
+    def get_list_cache_key(self, version):
+        """Return the cache key of this request's list response."""
+        params = []
+        for name in self.list_cache_params:
+            value = self.request.query_params.get(name)
+            if name in self.list_cache_flags:
+                value = '1' if value else None
+            if value:
+                params.append(f'{name}={_normalize(value)}')
+        key = '&'.join([self.request.get_host(), *params])
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return f'list:{self.request.user.pk}:{version}:{self.basename}:' \
+               f'{digest}'
+
+    def list(self, request, *args, **kwargs):
+        options = settings.RESPONSE_CACHE
+        cache = caches[options['CACHE_ALIAS']]
+        version = getattr(request, 'data_version', None)
+        if version is None:
+            version, _ = get_data_version(request.user.pk)
+        key = self.get_list_cache_key(version)
+
+        data = cache.get(key)
+        if data is not None:
+            record(self.basename, 'hit')
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        record(self.basename, 'miss')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, options['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,46 @@
+import json
+from itertools import islice
+
+from django.db.models import prefetch_related_objects
+
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def iter_chunks(queryset, chunk_size, *related_lookups):
+    """Yield the rows of queryset in lists of at most chunk_size.
+
+    Rows are read through a server-side cursor and each chunk gets its
+    related_lookups prefetched in one query per lookup, so memory use
+    depends on chunk_size rather than on the size of the queryset.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        prefetch_related_objects(chunk, *related_lookups)
+        yield chunk
+
+
+def _dumps(data):
+    """Encode data as compact JSON bytes."""
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def stream_ndjson(chunks, serializer_class):
+    """Yield one serialized line per row, one chunk at a time."""
+    for chunk in chunks:
+        data = serializer_class(chunk, many=True).data
+        yield b''.join(_dumps(item) + b'\n' for item in data)
+
+
+def stream_json_array(chunks, serializer_class):
+    """Yield the rows as a single JSON array, one chunk at a time."""
+    opened = False
+    for chunk in chunks:
+        data = serializer_class(chunk, many=True).data
+        body = b','.join(_dumps(item) for item in data)
+        yield (b',' if opened else b'[') + body
+        opened = True
+    yield b']' if opened else b'[]'
@@ -0,0 +1,152 @@
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from core.models import ImageJob, ImageRendition, Recipe
+from core.storage import release
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the thread pool that processes image jobs in this process."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PIPELINE['WORKERS'],
+                thread_name_prefix='image-job',
+            )
+        return _executor
+
+
+def enqueue(job):
+    """Process a job in this process's thread pool.
+
+    The job is submitted once the transaction that created it commits.
+    With IMAGE_PIPELINE['EAGER'] it runs right away in the calling thread
+    instead. Jobs of a process that dies first are left in the table for
+    the process_images command.
+    """
+    if settings.IMAGE_PIPELINE['EAGER']:
+        process_job(job.pk)
+    else:
+        transaction.on_commit(
+            lambda: get_executor().submit(_process_in_thread, job.pk)
+        )
+
+
+def _process_in_thread(job_id):
+    """Process a job with a database connection of the worker thread."""
+    close_old_connections()
+    try:
+        process_job(job_id)
+    except Exception:
+        logger.exception('Image job %s crashed.', job_id)
+    finally:
+        close_old_connections()
+
+
+def claim(job_id):
+    """Mark a pending job as processing, False if another worker has it."""
+    return ImageJob.objects.filter(pk=job_id, status=ImageJob.PENDING) \
+                           .update(status=ImageJob.PROCESSING,
+                                   updated_at=timezone.now()) == 1
+
+
+def output_formats():
+    """Return the formats renditions are written in."""
+    return [name for name in settings.IMAGE_PIPELINE['FORMATS']
+            if name != 'webp' or features.check('webp')]
+
+
+def normalize(image):
+    """Return the image upright, in a mode JPEG and WebP can encode.
+
+    Copies pixels only, so no EXIF, XMP or ICC metadata is carried over.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or \
+            (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render(image, widths, formats, quality):
+    """Yield (format, width, height, bytes) of each resized copy.
+
+    Images are never enlarged; widths above the original collapse into a
+    single copy at the original width.
+    """
+    sizes = sorted({min(width, image.width) for width in widths})
+    for width in sizes:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else \
+            image.resize((width, height), Image.LANCZOS)
+        for name in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=name.upper(), quality=quality,
+                         optimize=name == 'jpeg')
+            yield name, width, height, buffer.getvalue()
+
+
+def process_job(job_id):
+    """Render the renditions of a job's image and replace the old ones."""
+    if not claim(job_id):
+        return
+    job = ImageJob.objects.select_related('recipe').get(pk=job_id)
+    options = settings.IMAGE_PIPELINE
+    storage = Recipe._meta.get_field('image').storage
+    renditions = []
+    try:
+        with storage.open(job.source) as file:
+            image = normalize(Image.open(file))
+        for name, width, height, content in render(
+                image, options['WIDTHS'], output_formats(),
+                options['QUALITY']):
+            rendition = ImageRendition(recipe=job.recipe, format=name,
+                                       width=width, height=height)
+            rendition.file.save(f'rendition.{name}', ContentFile(content),
+                                save=False)
+            renditions.append(rendition)
+    except Exception as error:
+        logger.warning('Image job %s failed: %s', job_id, error)
+        _release_files(renditions)
+        _finish(job, ImageJob.FAILED, str(error) or type(error).__name__)
+        return
+
+    with transaction.atomic():
+        recipe = Recipe.objects.select_for_update().get(pk=job.recipe_id)
+        if recipe.image.name != job.source:
+            _release_files(renditions)
+            _finish(job, ImageJob.FAILED, 'Superseded by a newer upload.')
+            return
+        recipe.renditions.all().delete()
+        ImageRendition.objects.bulk_create(renditions)
+        _finish(job, ImageJob.DONE)
+
+
+def _finish(job, status, error=''):
+    """Record the outcome of a job."""
+    ImageJob.objects.filter(pk=job.pk).update(status=status, error=error,
+                                              updated_at=timezone.now())
+
+
+def _release_files(renditions):
+    """Release the stored files of renditions that weren't saved."""
+    for rendition in renditions:
+        release(rendition.file.storage, rendition.file.name)
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from recipe.views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+
+class Command(BaseCommand):
+    """Django command to EXPLAIN the first page query of each list endpoint."""
+    help = 'Print the query plan of every list endpoint for a user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Email of the user to plan for. Defaults to the user with '
+                 'the most recipes.',
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Run the queries and report actual times (EXPLAIN ANALYZE).',
+        )
+        parser.add_argument(
+            '--forbid', action='append', default=[], metavar='TEXT',
+            help='Fail if any plan contains TEXT, e.g. "Seq Scan on '
+                 'core_recipe". Can be given several times.',
+        )
+
+    def get_user(self, email):
+        """Return the user to plan for."""
+        users = get_user_model().objects
+        if email:
+            try:
+                return users.get(email=email)
+            except users.model.DoesNotExist:
+                raise CommandError(f'No user with email {email}.')
+        user = users.annotate(recipes=Count('recipe')) \
+                    .order_by('-recipes').first()
+        if user is None:
+            raise CommandError('There are no users to plan for.')
+        return user
+
+    def get_endpoints(self, user):
+        """Return (name, viewset class, query params) for each endpoint."""
+        tag_ids = ','.join(str(pk) for pk in user.tag_set.values_list(
+            'id', flat=True)[:3])
+        ingredient_ids = ','.join(str(pk) for pk in
+                                  user.ingredient_set.values_list(
+                                      'id', flat=True)[:3])
+        recipe = user.recipe_set.first()
+        search = recipe.title.split()[0] if recipe else 'soup'
+        return [
+            ('recipe-list', RecipeViewSet, {}),
+            ('recipe-list?tags', RecipeViewSet, {'tags': tag_ids or '0'}),
+            ('recipe-list?ingredients', RecipeViewSet,
+             {'ingredients': ingredient_ids or '0'}),
+            ('recipe-list?ingredients&match=all', RecipeViewSet,
+             {'ingredients': ingredient_ids or '0', 'match': 'all'}),
+            ('recipe-list?search', RecipeViewSet, {'search': search}),
+            ('tag-list', TagViewSet, {}),
+            ('tag-list?assigned_only', TagViewSet, {'assigned_only': '1'}),
+            ('tag-list?counts', TagViewSet, {'counts': '1'}),
+            ('ingredient-list', IngredientViewSet, {}),
+            ('ingredient-list?assigned_only', IngredientViewSet,
+             {'assigned_only': '1'}),
+        ]
+
+    def get_page_queryset(self, viewset_class, params, user):
+        """Return the query the endpoint runs for its first page."""
+        request = Request(APIRequestFactory().get('/', params))
+        request.user = user
+        view = viewset_class(request=request, action='list',
+                             format_kwarg=None, kwargs={})
+        page_size = view.pagination_class.page_size
+        return view.get_queryset()[:page_size + 1]
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        failures = []
+        for name, viewset_class, params in self.get_endpoints(user):
+            queryset = self.get_page_queryset(viewset_class, params, user)
+            plan = queryset.explain(analyze=options['analyze'])
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan + '\n')
+            failures += [f'{name}: plan contains "{text}"'
+                         for text in options['forbid'] if text in plan]
+
+        if failures:
+            raise CommandError('\n'.join(failures))
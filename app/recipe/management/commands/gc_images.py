@@ -0,0 +1,66 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import ImageRendition, Recipe, image_storage
+
+
+class Command(BaseCommand):
+    """Django command to delete image files no recipe references."""
+    help = 'Delete orphaned files under MEDIA_ROOT/uploads/recipe.'
+    directory = 'uploads/recipe'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='List the orphaned files without deleting them.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Only delete files not touched for this many seconds, so '
+                 'uploads in flight are left alone.',
+        )
+
+    def stored_files(self, directory):
+        """Yield the name of every file below directory."""
+        if not image_storage.exists(directory):
+            return
+        directories, files = image_storage.listdir(directory)
+        for name in files:
+            yield f'{directory}/{name}'
+        for name in directories:
+            yield from self.stored_files(f'{directory}/{name}')
+
+    def referenced_files(self):
+        """Return the names of every file a recipe or rendition uses."""
+        names = set(Recipe.objects.exclude(image='')
+                                  .exclude(image__isnull=True)
+                                  .values_list('image', flat=True)
+                                  .iterator())
+        names.update(ImageRendition.objects.values_list('file', flat=True)
+                                           .iterator())
+        return names
+
+    def handle(self, *args, **options):
+        cutoff = time.time() - options['min_age']
+        # References are read first. A file that gains one afterwards was
+        # touched by the upload that reused it, so it's too young to go.
+        referenced = self.referenced_files()
+        stored = orphans = freed = 0
+        for name in self.stored_files(self.directory):
+            stored += 1
+            if name in referenced or \
+                    os.path.getmtime(image_storage.path(name)) >= cutoff:
+                continue
+            orphans += 1
+            freed += image_storage.size(name)
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                image_storage.delete(name)
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {orphans} of {stored} files ({freed} bytes).'
+        ))
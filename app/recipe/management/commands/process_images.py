@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ImageJob
+from recipe.images import process_job
+
+
+class Command(BaseCommand):
+    """Django command to process pending recipe image jobs."""
+    help = 'Render the renditions of every pending image job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep polling for new jobs instead of exiting when done.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds between polls with --watch.',
+        )
+        parser.add_argument(
+            '--stale', type=int, default=600,
+            help='Retry jobs stuck processing for this many seconds, e.g. '
+                 'after their worker died.',
+        )
+
+    def requeue_stale(self, seconds):
+        """Return jobs abandoned while processing to the queue."""
+        cutoff = timezone.now() - timedelta(seconds=seconds)
+        return ImageJob.objects.filter(status=ImageJob.PROCESSING,
+                                       updated_at__lt=cutoff) \
+                               .update(status=ImageJob.PENDING)
+
+    def drain(self):
+        """Process pending jobs oldest first, return how many were run."""
+        job_ids = ImageJob.objects.filter(status=ImageJob.PENDING) \
+                                  .order_by('created_at') \
+                                  .values_list('id', flat=True)
+        for job_id in job_ids:
+            process_job(job_id)
+        return len(job_ids)
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = self.requeue_stale(options['stale'])
+            if requeued:
+                self.stdout.write(f'Requeued {requeued} stale jobs.')
+            processed = self.drain()
+            if processed:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Processed {processed} jobs.')
+                )
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
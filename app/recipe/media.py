@@ -0,0 +1,139 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import parse_etags
+
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from core.authentication import CachedTokenAuthentication
+from core.models import Recipe, image_storage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """File-like reading `length` bytes of a file from `start`.
+
+    It keeps fileno(), so WSGI servers whose wsgi.file_wrapper uses
+    sendfile() send the range without copying it through Python.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class MediaFileResponse(FileResponse):
+    block_size = 64 * 2 ** 10
+
+
+def parse_range(header, size):
+    """Return (start, end) of a single-range Range header.
+
+    Returns None when the header should be ignored and the whole file
+    served, and raises ValueError if the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError
+    return start, end
+
+
+class MediaView(APIView):
+    """Serve a recipe image or rendition to the owner of the recipe.
+
+    Stored names never change content, so responses may be cached for
+    good. With MEDIA_SERVE['BACKEND'] set to 'x-accel-redirect' or
+    'x-sendfile' the web server sends the file; otherwise a FileResponse
+    does, honoring single byte ranges.
+    """
+    authentication_classes = CachedTokenAuthentication,
+    permission_classes = IsAuthenticated,
+
+    def check_access(self, name):
+        """Raise NotFound unless one of the user's recipes uses the file."""
+        recipes = Recipe.objects.filter(user=self.request.user)
+        if not (recipes.filter(image=name).exists() or
+                recipes.filter(renditions__file=name).exists()):
+            raise NotFound()
+
+    def get(self, request, path):
+        self.check_access(path)
+        options = settings.MEDIA_SERVE
+        etag = '"{}"'.format(os.path.splitext(os.path.basename(path))[0])
+        content_type = mimetypes.guess_type(path)[0] or \
+            'application/octet-stream'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f'private, max-age={options["MAX_AGE"]}, '
+                             f'immutable',
+        }
+
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponse(status=304)
+        elif options['BACKEND'] == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = options['ACCEL_PREFIX'] + path
+        elif options['BACKEND'] == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = image_storage.path(path)
+        else:
+            response = self.file_response(path, etag, content_type)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    def file_response(self, path, etag, content_type):
+        """Return the file, or the byte range the client asked for."""
+        try:
+            file = image_storage.open(path)
+        except FileNotFoundError:
+            raise NotFound()
+        size = image_storage.size(path)
+        range_header = self.request.META.get('HTTP_RANGE')
+        if_range = self.request.META.get('HTTP_IF_RANGE')
+        try:
+            byte_range = parse_range(range_header, size) \
+                if if_range in (None, etag) else None
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        start, end = byte_range or (0, size - 1)
+        response = MediaFileResponse(FileRange(file, start, end - start + 1),
+                                     content_type=content_type,
+                                     status=206 if byte_range else 200)
+        response['Content-Length'] = end - start + 1
+        response['Accept-Ranges'] = 'bytes'
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return response
@@ -0,0 +1,138 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.changes import batch_data_changes, get_data_version
+
+
+class BulkModelMixin:
+    """Create, update or delete a list of objects in one request.
+
+    POST takes a list of objects to create, PATCH a list of partial objects
+    with their `id` and DELETE a list of ids. Nothing is written unless
+    every item is valid; otherwise the response holds one error entry per
+    item, empty for the valid ones.
+    """
+    bulk_max_items = 1000
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Dispatch a bulk request on its method."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Expected a list of items.'
+            ]})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Send at most {self.bulk_max_items} items per request.'
+            ]})
+
+        with batch_data_changes():
+            if request.method == 'POST':
+                return self.bulk_create(items)
+            if request.method == 'PATCH':
+                return self.bulk_update(items)
+            return self.bulk_destroy(items)
+
+    def bulk_create(self, items):
+        """Create the objects of a list of items."""
+        serializer = self.get_serializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        """Partially update the objects with the ids given in the items."""
+        ids = [item.get('id') if isinstance(item, dict) else None
+               for item in items]
+        instances = self.get_bulk_instances(ids)
+        serializer = self.get_serializer(
+            [instances[pk] for pk in ids],
+            data=items,
+            many=True,
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    def bulk_destroy(self, items):
+        """Delete the objects with the ids given in the items."""
+        instances = self.get_bulk_instances(items)
+        self.get_queryset().filter(pk__in=list(instances)).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_bulk_instances(self, ids):
+        """Return the user's objects by id, or raise per-item errors.
+
+        An id may only be given once; each repeat of it is an error.
+        """
+        valid_ids = {pk for pk in ids
+                     if isinstance(pk, int) and not isinstance(pk, bool)}
+        instances = self.get_queryset().in_bulk(valid_ids)
+
+        errors, seen = [], set()
+        for pk in ids:
+            if pk not in instances:
+                errors.append({'id': ['Not found.']})
+            elif pk in seen:
+                errors.append({'id': ['Duplicate id.']})
+            else:
+                errors.append({})
+                seen.add(pk)
+        if any(errors):
+            raise ValidationError(errors)
+        return instances
+
+
+class ConditionalGetMixin:
+    """Answer conditional list and detail GETs from the user's data version.
+
+    Every write to a user's recipes, tags or ingredients bumps the user's
+    data version, so one lookup of it is enough to tell whether a response
+    the client already holds is still current. Views wrap their detail
+    actions with conditional() themselves.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def get_etag(self, version):
+        """Return the ETag of this request's response at `version`."""
+        key = '|'.join([
+            str(self.request.user.pk),
+            str(version),
+            self.request.get_full_path(),
+            self.request.accepted_media_type or '',
+        ])
+        return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+    def conditional(self, view, request, *args, **kwargs):
+        """Return 304 if the client's copy is current, else call view."""
+        version, modified_at = get_data_version(request.user.pk)
+        request.data_version = version
+        etag = self.get_etag(version)
+        last_modified = timegm(modified_at.utctimetuple()) \
+            if modified_at else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,121 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginate on the view's ordering values rather than on an offset.
+
+    The cursor holds the ordering values of the last row of a page and the
+    next page is fetched with a WHERE clause on them, so a page costs the
+    same however deep the client has paged. Views set `keyset_ordering`,
+    which must end with a unique field.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    paginate_query_param = 'paginate'
+    ordering = '-id',
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a page of rows, or None when the client opted out."""
+        if self.is_opted_out(request):
+            return None
+
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_position_filter(position))
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_ordering(self, view):
+        """Return the view's keyset ordering for the current request."""
+        if hasattr(view, 'get_keyset_ordering'):
+            return view.get_keyset_ordering()
+        return getattr(view, 'keyset_ordering', self.ordering)
+
+    def is_opted_out(self, request):
+        """Return True when the client asked for an unpaginated list."""
+        value = request.query_params.get(self.paginate_query_param, '')
+        return value.lower() in ('0', 'false', 'no')
+
+    def get_page_size(self, request):
+        """Return the requested page size, capped at max_page_size."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position_filter(self, position):
+        """Build the filter for rows after `position` in the ordering.
+
+        For an ordering (a, b) that is `a after x OR (a = x AND b after y)`.
+        """
+        position_filter = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            position_filter |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return position_filter
+
+    def get_position(self, row):
+        """Return the ordering values of a row."""
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def decode_cursor(self, request):
+        """Return the position encoded in the request's cursor, if any."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        """Return an opaque cursor for `position`."""
+        encoded = json.dumps(position, separators=(',', ':')).encode('utf-8')
+        return urlsafe_b64encode(encoded).decode('ascii')
+
+    def get_next_link(self):
+        """Return the URL of the next page, or None on the last page."""
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.get_position(self.page[-1]))
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,14 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Renderer for newline-delimited JSON, one document per line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` as a single JSON line."""
+        if data is None:
+            return bytes()
+        return super().render(data, accepted_media_type,
+                              renderer_context) + b'\n'
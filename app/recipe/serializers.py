@@ -1,5 +1,136 @@
-from rest_framework.serializers import ModelSerializer, PrimaryKeyRelatedField
-from core.models import Tag, Ingredient, Recipe
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import ModelSerializer, ListSerializer, \
+                                       PrimaryKeyRelatedField, IntegerField, \
+                                       SerializerMethodField
+from core.changes import data_changed
+from core.search import defer_recipe_indexing
+from core.signals import bulk_saved
+from core.models import Tag, Ingredient, Recipe, ImageJob, \
+                        ImageRendition
+
+
+class BulkPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """Primary key field that can resolve pks looked up ahead of time.
+
+    BulkListSerializer fetches every pk of a payload in one query and puts
+    the objects in the `related_objects` context, keyed by model.
+    """
+
+    def to_internal_value(self, data):
+        objects = self.context.get('related_objects', {}) \
+                              .get(self.get_queryset().model)
+        if objects is None:
+            return super().to_internal_value(data)
+        try:
+            return objects[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class BulkListSerializer(ListSerializer):
+    """List serializer that validates and writes all items in bulk."""
+
+    def _related_fields(self):
+        """Return the child's many-to-many primary key fields."""
+        return [
+            field for field in self.child.fields.values()
+            if isinstance(field, ManyRelatedField) and
+            isinstance(field.child_relation, BulkPrimaryKeyRelatedField)
+        ]
+
+    def _fetch_related_objects(self, data):
+        """Look up the related pks of every item with one query per field."""
+        related_objects = self._context.setdefault('related_objects', {})
+        for field in self._related_fields():
+            pks = set()
+            for item in data:
+                values = item.get(field.field_name) \
+                    if isinstance(item, dict) else None
+                for value in values if isinstance(values, list) else ():
+                    try:
+                        pks.add(int(value))
+                    except (TypeError, ValueError):
+                        pass
+            queryset = field.child_relation.get_queryset()
+            related_objects[queryset.model] = queryset.in_bulk(pks)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._fetch_related_objects(data)
+        return super().to_internal_value(data)
+
+    def _many_to_many(self):
+        """Return the model's many-to-many fields written by the child."""
+        model = self.child.Meta.model
+        return [field for field in model._meta.many_to_many
+                if field.name in self.child.fields]
+
+    def _set_relations(self, instances, relations, replace=False):
+        """Write the through rows of `relations` with one insert per field.
+
+        `relations` holds a {field name: objects} dict per instance. With
+        `replace`, existing rows of the given fields are deleted first.
+        """
+        for field in self._many_to_many():
+            through = field.remote_field.through
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+            changed = [
+                (instance, {obj.pk for obj in related[field.name]})
+                for instance, related in zip(instances, relations)
+                if field.name in related
+            ]
+            if replace and changed:
+                through.objects.filter(**{
+                    f'{source}__in': [instance.pk for instance, _ in changed]
+                }).delete()
+            through.objects.bulk_create([
+                through(**{source: instance.pk, target: pk})
+                for instance, pks in changed
+                for pk in pks
+            ])
+        prefetch_related_objects(
+            instances, *[field.name for field in self._many_to_many()]
+        )
+
+    def _pop_relations(self, validated_data):
+        """Split the many-to-many values off each item's attributes."""
+        names = [field.name for field in self._many_to_many()]
+        return [
+            {name: attrs.pop(name) for name in names if name in attrs}
+            for attrs in validated_data
+        ]
+
+    def create(self, validated_data):
+        """Create every item with bulk inserts in a single transaction."""
+        model = self.child.Meta.model
+        relations = self._pop_relations(validated_data)
+        instances = [model(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+            self._set_relations(instances, relations)
+            bulk_saved.send(sender=model, instances=instances)
+            data_changed(*{instance.user_id for instance in instances})
+        return instances
+
+    def update(self, instances, validated_data):
+        """Update each instance with its item in a single transaction."""
+        relations = self._pop_relations(validated_data)
+        with transaction.atomic(), defer_recipe_indexing():
+            for instance, attrs in zip(instances, validated_data):
+                for name, value in attrs.items():
+                    setattr(instance, name, value)
+                if attrs:
+                    instance.save(update_fields=list(attrs))
+            self._set_relations(instances, relations, replace=True)
+            bulk_saved.send(sender=self.child.Meta.model, instances=instances)
+            data_changed(*{instance.user_id for instance in instances})
+        return instances
 
 
 class TagSerializer(ModelSerializer):
@@ -9,6 +140,15 @@ class TagSerializer(ModelSerializer):
         model = Tag
         fields = 'id', 'name'
         read_only_fields = 'id',
+        list_serializer_class = BulkListSerializer
+
+
+class TagCountSerializer(TagSerializer):
+    """The serializer for tags with the number of recipes using them."""
+    recipe_count = IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ('recipe_count',)
 
 
 class IngredientSerializer(ModelSerializer):
@@ -18,15 +158,24 @@ class IngredientSerializer(ModelSerializer):
         model = Ingredient
         fields = 'id', 'name'
         read_only_fields = 'id',
+        list_serializer_class = BulkListSerializer
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """The serializer for ingredients with the number of recipes using them."""
+    recipe_count = IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ('recipe_count',)
 
 
 class RecipeSerializer(ModelSerializer):
     """The serializer for recipe objects."""
-    ingredients = PrimaryKeyRelatedField(
+    ingredients = BulkPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
-    tags = PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -36,6 +185,7 @@ class RecipeSerializer(ModelSerializer):
         fields = 'id', 'title', 'ingredients',  \
                  'tags', 'time', 'price', 'link'
         read_only_fields = 'id',
+        list_serializer_class = BulkListSerializer
 
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -52,3 +202,35 @@ class RecipeImageSerializer(ModelSerializer):
         fields = 'id', 'image'
         read_only_fields = 'id',
 
+
+class ImageJobSerializer(ModelSerializer):
+    """Serialize the processing status of an uploaded image."""
+
+    class Meta:
+        model = ImageJob
+        fields = 'id', 'status', 'error', 'created_at', 'updated_at'
+        read_only_fields = fields
+
+
+class ImageRenditionSerializer(ModelSerializer):
+    """Serialize a resized copy of a recipe image."""
+
+    class Meta:
+        model = ImageRendition
+        fields = 'format', 'width', 'height', 'file'
+        read_only_fields = fields
+
+
+class RecipeImageStatusSerializer(ModelSerializer):
+    """Serialize a recipe image with its latest job and renditions."""
+    job = SerializerMethodField()
+    renditions = ImageRenditionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Recipe
+        fields = 'id', 'image', 'job', 'renditions'
+        read_only_fields = fields
+
+    def get_job(self, recipe):
+        job = recipe.image_jobs.order_by('-id').first()
+        return ImageJobSerializer(job).data if job else None
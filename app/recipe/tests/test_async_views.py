@@ -0,0 +1,171 @@
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.asgi import get_asgi_application
+from core.models import Recipe, Tag, Ingredient
+from recipe.async_views import AsyncRecipeViewSet
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class AsyncTestMixin:
+    """Let the threads async views query on close their connections."""
+
+    def setUp(self):
+        super().setUp()
+        settings_dict = connections.databases['default']
+        self.addCleanup(settings_dict.__setitem__, 'CONN_MAX_AGE',
+                        settings_dict['CONN_MAX_AGE'])
+        settings_dict['CONN_MAX_AGE'] = 0
+
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.recipes = []
+        for number in range(3):
+            recipe = Recipe.objects.create(user=self.user,
+                                           title=f'Recipe {number}',
+                                           time=5, price=25)
+            recipe.tags.add(Tag.objects.create(user=self.user,
+                                               name=f'Tag {number}'))
+            recipe.ingredients.add(Ingredient.objects.create(
+                user=self.user, name=f'Ingredient {number}'
+            ))
+            self.recipes.append(recipe)
+
+
+@override_settings(ROOT_URLCONF='app.async_urls')
+class AsyncRecipeViewSetTests(AsyncTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list(self):
+        """Test the list matches the sync view's, with relations fetched
+        on other connections.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = RecipeSerializer(reversed(self.recipes), many=True)
+        self.assertEqual(response.data['results'], expected.data)
+        self.assertFalse(any('core_recipe_tags' in query['sql']
+                             for query in context.captured_queries))
+
+    def test_list_unpaginated(self):
+        """Test relations are fetched when the list isn't paginated."""
+        response = self.client.get(RECIPES_URL, {'paginate': 'false'})
+
+        expected = RecipeSerializer(reversed(self.recipes), many=True)
+        self.assertEqual(response.data, expected.data)
+
+    def test_query_threads_close_connections(self):
+        """Test the threads relations are fetched on keep no connection."""
+        connections['default'].settings_dict['CONN_MAX_AGE'] = 60
+        before = self.backend_count()
+
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(self.backend_count(), before)
+
+    def backend_count(self):
+        """Return the number of connections to the test database."""
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM pg_stat_activity '
+                           'WHERE datname = current_database()')
+            return cursor.fetchone()[0]
+
+    def test_retrieve(self):
+        """Test the detail view nests the recipe's tags and ingredients."""
+        recipe = self.recipes[0]
+        response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.data, RecipeDetailSerializer(recipe).data)
+
+
+class AsgiApplicationTests(AsyncTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.application = get_asgi_application(urlconf='app.async_urls')
+        self.token = Token.objects.create(user=self.user).key
+
+    async def get(self, path):
+        """Send a GET for path, return (status, body)."""
+        communicator = ApplicationCommunicator(self.application, {
+            'type': 'http',
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'root_path': '',
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {self.token}'.encode()),
+            ],
+            'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(10)
+        body = b''
+        while True:
+            message = await communicator.receive_output(10)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        return start['status'], body
+
+    def test_serves_async_views(self):
+        """Test the ASGI application serves the recipe list."""
+        code, body = async_to_sync(self.get)(RECIPES_URL)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        expected = RecipeSerializer(reversed(self.recipes), many=True)
+        self.assertEqual(json.loads(body)['results'], expected.data)
+
+    def test_slow_request_does_not_block_others(self):
+        """Test requests are served while another one waits."""
+        release = threading.Event()
+        retrieve = AsyncRecipeViewSet.retrieve
+
+        def slow_retrieve(view, *args, **kwargs):
+            release.wait(10)
+            return retrieve(view, *args, **kwargs)
+
+        async def requests():
+            import asyncio
+            slow = asyncio.ensure_future(
+                self.get(detail_url(self.recipes[0].id))
+            )
+            code, _ = await self.get(RECIPES_URL)
+            self.assertFalse(slow.done())
+            release.set()
+            return code, (await slow)[0]
+
+        with mock.patch.object(AsyncRecipeViewSet, 'retrieve',
+                               slow_retrieve):
+            codes = async_to_sync(requests)()
+
+        self.assertEqual(codes, (status.HTTP_200_OK, status.HTTP_200_OK))
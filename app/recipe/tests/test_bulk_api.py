@@ -0,0 +1,168 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from core.tests.utils import QueryCountMixin
+
+RECIPES_BULK_URL = reverse('recipe:recipe-bulk')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {'title': 'Borscht', 'time': 5, 'price': 25}
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class BulkApiTests(QueryCountMixin, TestCase):
+    """Test the bulk create, update and delete endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(user=self.user,
+                                                    name='Carrot')
+
+    def recipe_payload(self, title='Salad'):
+        """Return a valid recipe item."""
+        return {
+            'title': title,
+            'time': 10,
+            'price': '5.00',
+            'tags': [self.tag.id],
+            'ingredients': [self.ingredient.id],
+        }
+
+    def test_bulk_create_recipes(self):
+        """Test creating recipes with their tags and ingredients."""
+        payload = [self.recipe_payload('Salad'), self.recipe_payload('Soup')]
+
+        response = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 2)
+        for item in response.data:
+            recipe = Recipe.objects.get(id=item['id'])
+            self.assertEqual(recipe.user, self.user)
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(list(recipe.ingredients.all()),
+                             [self.ingredient])
+
+    def test_bulk_create_queries_constant(self):
+        """Test the number of queries doesn't grow with the payload."""
+        def create(count):
+            self.payload = [self.recipe_payload() for _ in range(count)]
+
+        self.assertConstantQueries(
+            create,
+            lambda: self.client.post(RECIPES_BULK_URL, self.payload,
+                                     format='json'),
+        )
+
+    def test_bulk_create_per_item_errors(self):
+        """Test invalid items are reported and nothing is created."""
+        invalid = self.recipe_payload()
+        invalid['tags'] = [self.tag.id + 100]
+        payload = [self.recipe_payload(), invalid, {'title': ''}]
+
+        response = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('tags', response.data[1])
+        self.assertIn('title', response.data[2])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update_recipes(self):
+        """Test partially updating several recipes."""
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        recipe2.tags.add(self.tag)
+        payload = [
+            {'id': recipe1.id, 'title': 'Okroshka', 'tags': [self.tag.id]},
+            {'id': recipe2.id, 'tags': []},
+        ]
+
+        response = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        self.assertEqual(recipe1.title, 'Okroshka')
+        self.assertEqual(list(recipe1.tags.all()), [self.tag])
+        self.assertFalse(recipe2.tags.exists())
+
+    def test_bulk_update_other_users_recipe(self):
+        """Test recipes of other users can't be updated."""
+        user2 = get_user_model().objects.create_user('other@google.com',
+                                                     'testpass')
+        recipe = sample_recipe(user2)
+        payload = [{'id': recipe.id, 'title': 'Mine now'}]
+
+        response = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, [{'id': ['Not found.']}])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Borscht')
+
+    def test_bulk_update_duplicate_id(self):
+        """Test an id given twice is reported on its repeat."""
+        recipe = sample_recipe(self.user)
+        payload = [{'id': recipe.id, 'tags': [self.tag.id]}] * 2
+
+        response = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, [{}, {'id': ['Duplicate id.']}])
+        self.assertFalse(recipe.tags.exists())
+
+    def test_bulk_delete_recipes(self):
+        """Test deleting several recipes."""
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        kept = sample_recipe(self.user)
+
+        response = self.client.delete(RECIPES_BULK_URL,
+                                      [recipe1.id, recipe2.id],
+                                      format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Recipe.objects.all()), [kept])
+
+    def test_bulk_delete_unknown_id(self):
+        """Test nothing is deleted if one of the ids is unknown."""
+        recipe = sample_recipe(self.user)
+
+        response = self.client.delete(RECIPES_BULK_URL,
+                                      [recipe.id, recipe.id + 100],
+                                      format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_requires_list(self):
+        """Test a payload that isn't a list is rejected."""
+        response = self.client.post(RECIPES_BULK_URL, self.recipe_payload(),
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_tags(self):
+        """Test creating several tags at once."""
+        payload = [{'name': 'Breakfast'}, {'name': 'Dinner'}]
+
+        response = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        names = Tag.objects.filter(user=self.user) \
+                           .values_list('name', flat=True)
+        self.assertEqual(set(names), {'Vegan', 'Breakfast', 'Dinner'})
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import get_cache_stats, reset_cache_stats
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class ListCacheTests(TestCase):
+    """Test caching of list responses."""
+
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                            time=5, price=25)
+        self.tag = Tag.objects.create(user=self.user, name='Soup')
+
+    def test_list_cached(self):
+        """Test a repeated list is served from the cache."""
+        first = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+
+    def test_write_invalidates(self):
+        """Test saving a recipe invalidates the cached list."""
+        self.client.get(RECIPES_URL)
+        self.recipe.title = 'Okroshka'
+        self.recipe.save()
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['title'], 'Okroshka')
+
+    def test_relation_change_invalidates(self):
+        """Test assigning a tag invalidates the cached tag list."""
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+        self.recipe.tags.add(self.tag)
+
+        response = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_params_normalized(self):
+        """Test equivalent filters share a cache entry."""
+        other = Tag.objects.create(user=self.user, name='Cold')
+        self.client.get(RECIPES_URL, {'tags': f'{self.tag.id},{other.id}'})
+
+        response = self.client.get(
+            RECIPES_URL, {'tags': f'{other.id},{self.tag.id}', '_': 'x'}
+        )
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_cache_limited_to_user(self):
+        """Test users never get each other's cached lists."""
+        self.client.get(RECIPES_URL)
+        user2 = get_user_model().objects.create_user('other@google.com',
+                                                     'testpass')
+        self.client.force_authenticate(user2)
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_hit_and_miss_counters(self):
+        """Test hits and misses are counted per endpoint."""
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(get_cache_stats(), {
+            'recipe': {'hit': 1, 'miss': 1},
+            'tag': {'hit': 0, 'miss': 1},
+        })
+
+    @override_settings(RESPONSE_CACHE={'CACHE_ALIAS': 'default',
+                                       'TIMEOUT': 60,
+                                       'VERSION_TIMEOUT': 60})
+    def test_cached_version(self):
+        """Test a hit runs no query when data versions are cached."""
+        self.client.get(RECIPES_URL)
+        with self.assertNumQueries(0):
+            self.client.get(RECIPES_URL)
+
+        self.client.post(RECIPES_URL, {'title': 'Soup', 'time': 5,
+                                       'price': 3})
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
@@ -0,0 +1,92 @@
+import os
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Recipe, Tag, image_storage
+from core.tests.utils import MediaRootMixin
+
+
+class ExplainListsCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                       time=5, price=25)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Soup'))
+
+    def test_explain_every_list_endpoint(self):
+        """Test a plan is printed for each list endpoint."""
+        out = StringIO()
+        call_command('explain_lists', user=self.user.email, stdout=out)
+
+        output = out.getvalue()
+        for name in ('recipe-list', 'tag-list?assigned_only',
+                     'ingredient-list'):
+            self.assertIn(name, output)
+
+    def test_explain_forbidden_plan(self):
+        """Test the command fails when a plan contains forbidden text."""
+        with self.assertRaises(CommandError):
+            call_command('explain_lists', forbid=['core_recipe'],
+                         stdout=StringIO())
+
+    def test_explain_unknown_user(self):
+        """Test the command fails for an unknown user."""
+        with self.assertRaises(CommandError):
+            call_command('explain_lists', user='nobody@google.com',
+                         stdout=StringIO())
+
+
+class GcImagesCommandTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_user('test@google.com',
+                                                    'testpass')
+        self.recipe = Recipe.objects.create(user=user, title='Borscht',
+                                            time=5, price=25)
+        self.recipe.image.save('photo.jpg', ContentFile(b'used'))
+        self.orphan = image_storage.save('uploads/recipe/a.jpg',
+                                         ContentFile(b'orphan'))
+        self.young = image_storage.save('uploads/recipe/b.jpg',
+                                        ContentFile(b'young'))
+        self.age(self.recipe.image.name, 7200)
+        self.age(self.orphan, 7200)
+
+    def age(self, name, seconds):
+        """Make a stored file look seconds old."""
+        path = image_storage.path(name)
+        mtime = os.path.getmtime(path) - seconds
+        os.utime(path, (mtime, mtime))
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_images', *args, stdout=out)
+        return out.getvalue()
+
+    def test_orphans_deleted(self):
+        """Test old unreferenced files are deleted."""
+        output = self.gc()
+
+        self.assertEqual(self.stored_files(),
+                         sorted([self.recipe.image.name, self.young]))
+        self.assertIn('Deleted 1 of 3 files', output)
+
+    def test_dry_run(self):
+        """Test a dry run lists orphans without deleting them."""
+        output = self.gc('--dry-run')
+
+        self.assertIn(self.orphan, output)
+        self.assertEqual(len(self.stored_files()), 3)
+
+    def test_min_age(self):
+        """Test --min-age controls which files are old enough."""
+        self.gc('--min-age', '0')
+
+        self.assertEqual(self.stored_files(), [self.recipe.image.name])
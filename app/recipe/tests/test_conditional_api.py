@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+RECIPES_BULK_URL = reverse('recipe:recipe-bulk')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return a url of recipe details."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling of the recipe API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                            time=5, price=25)
+
+    def assertNotModified(self, url, etag):
+        """Assert a GET of url with etag is answered with a 304."""
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_not_modified(self):
+        """Test an unchanged recipe list is answered from its version."""
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+        self.assertNotModified(RECIPES_URL, response['ETag'])
+
+    def test_detail_not_modified(self):
+        """Test an unchanged recipe detail is answered from its version."""
+        url = detail_url(self.recipe.id)
+        response = self.client.get(url)
+
+        self.assertNotModified(url, response['ETag'])
+
+    def test_etag_varies_with_query(self):
+        """Test responses to different queries get different ETags."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        response = self.client.get(RECIPES_URL, {'page_size': 1},
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_write_changes_etag(self):
+        """Test creating a recipe invalidates the list's ETag."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+        self.client.post(RECIPES_URL, {'title': 'Soup', 'time': 5,
+                                       'price': 3})
+
+        response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_tag_assignment_changes_etag(self):
+        """Test assigning a tag invalidates the tag list's ETag."""
+        tag = Tag.objects.create(user=self.user, name='Soup')
+        params = {'assigned_only': 1}
+        etag = self.client.get(TAGS_URL, params)['ETag']
+        self.recipe.tags.add(tag)
+
+        response = self.client.get(TAGS_URL, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_bulk_write_bumps_version_once(self):
+        """Test a bulk request bumps the data version a single time."""
+        self.user.refresh_from_db()
+        version = self.user.data_version
+        payload = [{'title': 'Soup', 'time': 5, 'price': 3,
+                    'tags': [], 'ingredients': []}] * 3
+
+        response = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.data_version, version + 1)
@@ -0,0 +1,173 @@
+import io
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ImageJob, Recipe
+from core.tests.utils import MediaRootMixin
+
+PIPELINE = {
+    'EAGER': True,
+    'WORKERS': 1,
+    'WIDTHS': (320, 800),
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+}
+
+
+def image_upload_url(recipe_id):
+    """Return URL for recipe image upload."""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def image_status_url(recipe_id):
+    """Return URL for the processing status of a recipe image."""
+    return reverse('recipe:recipe-image', args=[recipe_id])
+
+
+def sample_image(size=(40, 20), orientation=None, name='photo.jpg'):
+    """Return a JPEG file, optionally with an EXIF orientation."""
+    file = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new('RGB', size, 'red').save(file, format='JPEG', exif=exif)
+    file.name = name
+    file.seek(0)
+    return file
+
+
+@override_settings(IMAGE_PIPELINE=PIPELINE)
+class ImagePipelineTests(MediaRootMixin, TestCase):
+    """Test processing uploaded recipe images."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                            time=5, price=25)
+
+    def upload(self, file):
+        return self.client.post(image_upload_url(self.recipe.id),
+                                {'image': file}, format='multipart')
+
+    def test_renditions_created(self):
+        """Test an upload is resized to each width and format."""
+        response = self.upload(sample_image(size=(1000, 500)))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['job']['status'], 'done')
+        sizes = [(item['format'], item['width'], item['height'])
+                 for item in response.data['renditions']]
+        self.assertEqual(sizes, [
+            ('jpeg', 320, 160), ('webp', 320, 160),
+            ('jpeg', 800, 400), ('webp', 800, 400),
+        ])
+        for rendition in self.recipe.renditions.all():
+            with Image.open(rendition.file.path) as image:
+                self.assertEqual(image.format, rendition.format.upper())
+                self.assertEqual(image.size,
+                                 (rendition.width, rendition.height))
+
+    def test_small_image_not_enlarged(self):
+        """Test an image narrower than every width keeps its size."""
+        self.upload(sample_image(size=(40, 20)))
+
+        self.assertEqual(
+            {(r.width, r.height) for r in self.recipe.renditions.all()},
+            {(40, 20)},
+        )
+
+    def test_orientation_normalized_and_metadata_stripped(self):
+        """Test EXIF rotation is applied and EXIF is dropped."""
+        self.upload(sample_image(size=(40, 20), orientation=6))
+
+        rendition = self.recipe.renditions.get(format='jpeg')
+        with Image.open(rendition.file.path) as image:
+            self.assertEqual(image.size, (20, 40))
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_new_upload_replaces_renditions(self):
+        """Test renditions of a previous image are replaced."""
+        self.upload(sample_image())
+
+        self.upload(sample_image(size=(30, 30)))
+
+        self.assertEqual(
+            {(r.width, r.height) for r in self.recipe.renditions.all()},
+            {(30, 30)},
+        )
+
+    def test_status_endpoint(self):
+        """Test the image status lists rendition URLs."""
+        self.upload(sample_image())
+
+        response = self.client.get(image_status_url(self.recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['job']['status'], 'done')
+        self.assertTrue(response.data['renditions'][0]['file']
+                        .startswith('http://testserver/media/'))
+
+    def test_status_limited_to_user(self):
+        """Test other users can't see the image status."""
+        user2 = get_user_model().objects.create_user('other@google.com',
+                                                     'testpass')
+        self.client.force_authenticate(user2)
+
+        response = self.client.get(image_status_url(self.recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unreadable_image_fails_job(self):
+        """Test a job whose image can't be decoded is marked failed."""
+        self.recipe.image.save('broken.jpg', io.BytesIO(b'not an image'))
+        job = ImageJob.objects.create(recipe=self.recipe,
+                                      source=self.recipe.image.name)
+
+        with self.assertLogs('recipe.images', 'WARNING'):
+            call_command('process_images', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.FAILED)
+        self.assertTrue(job.error)
+        self.assertEqual(self.recipe.renditions.count(), 0)
+
+    @override_settings(IMAGE_PIPELINE=dict(PIPELINE, EAGER=False))
+    def test_command_processes_pending_jobs(self):
+        """Test jobs left pending are processed by the command."""
+        response = self.upload(sample_image())
+        self.assertEqual(response.data['job']['status'], 'pending')
+
+        call_command('process_images', stdout=io.StringIO())
+
+        job = ImageJob.objects.get(pk=response.data['job']['id'])
+        self.assertEqual(job.status, ImageJob.DONE)
+        self.assertEqual(self.recipe.renditions.count(), 2)
+
+    @override_settings(IMAGE_PIPELINE=dict(PIPELINE, EAGER=False))
+    def test_superseded_job_discarded(self):
+        """Test a job for a replaced image doesn't overwrite renditions."""
+        first = self.upload(sample_image()).data['job']['id']
+        second = self.upload(sample_image(size=(30, 30))).data['job']['id']
+
+        call_command('process_images', stdout=io.StringIO())
+
+        self.assertEqual(ImageJob.objects.get(pk=first).status,
+                         ImageJob.FAILED)
+        self.assertEqual(ImageJob.objects.get(pk=second).status,
+                         ImageJob.DONE)
+        self.assertEqual(
+            {r.width for r in self.recipe.renditions.all()}, {30}
+        )
@@ -45,7 +45,7 @@ class PrivateIngredientsApiTests(TestCase):
         response = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test that only the ingredient of the auth'ed user are returned."""
@@ -62,7 +62,7 @@ class PrivateIngredientsApiTests(TestCase):
         response = self.client.get(INGREDIENTS_URL)
     
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         
     def test_create_ingredient_successful(self):
         """Test creating a new ingredient."""
@@ -95,5 +95,22 @@ class PrivateIngredientsApiTests(TestCase):
         serializer1 = IngredientSerializer(ingredient1)
         serializer2 = IngredientSerializer(ingredient2)
 
-        self.assertIn(serializer2.data, response.data) 
-        self.assertNotIn(serializer1.data, response.data) 
+        self.assertIn(serializer2.data, response.data['results']) 
+        self.assertNotIn(serializer1.data, response.data['results']) 
+
+    def test_retrieve_ingredients_assigned_unique(self):
+        """Test an ingredient used by many recipes is returned once."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Eggs')
+        for _ in range(3):
+            recipe = Recipe.objects.create(user=self.user, title='Omelette',
+                                           time=5, price=4)
+            recipe.ingredients.add(ingredient)
+
+        response = self.client.get(INGREDIENTS_URL,
+                                   {'assigned_only': 1, 'counts': 1})
+
+        self.assertEqual(response.data['results'], [{
+            'id': ingredient.id,
+            'name': ingredient.name,
+            'recipe_count': 3,
+        }])
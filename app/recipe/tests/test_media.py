@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ImageRendition, Recipe, image_storage
+from core.tests.utils import MediaRootMixin
+
+CONTENT = b'0123456789'
+
+
+def media_url(name):
+    """Return URL serving a stored file."""
+    return reverse('media', args=[name])
+
+
+def read(response):
+    return b''.join(response.streaming_content)
+
+
+class MediaViewTests(MediaRootMixin, TestCase):
+    """Test serving recipe images to their owners."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                            time=5, price=25)
+        self.recipe.image.save('photo.jpg', ContentFile(CONTENT))
+        self.url = media_url(self.recipe.image.name)
+
+    def test_owner_gets_file(self):
+        """Test the owner downloads the image with cache headers."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(read(response), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_rendition_served(self):
+        """Test renditions of the user's recipes are served."""
+        rendition = ImageRendition(recipe=self.recipe, format='jpeg',
+                                   width=1, height=1)
+        rendition.file.save('small.jpg', ContentFile(b'small'))
+
+        response = self.client.get(media_url(rendition.file.name))
+
+        self.assertEqual(read(response), b'small')
+
+    def test_other_users_forbidden(self):
+        """Test other users can't download the image."""
+        user2 = get_user_model().objects.create_user('other@google.com',
+                                                     'testpass')
+        self.client.force_authenticate(user2)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_login_required(self):
+        """Test anonymous requests are refused."""
+        response = APIClient().get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unreferenced_file_not_found(self):
+        """Test files no recipe uses aren't served."""
+        name = image_storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+
+        response = self.client.get(media_url(name))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_byte_range(self):
+        """Test a byte range is answered with partial content."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(read(response), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_suffix_range(self):
+        """Test a range of the last bytes."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+
+        self.assertEqual(read(response), b'789')
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file is refused."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_stale_if_range(self):
+        """Test the whole file is sent when If-Range doesn't match."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5',
+                                   HTTP_IF_RANGE='"other"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(read(response), CONTENT)
+
+    def test_not_modified(self):
+        """Test a cached copy is revalidated without the body."""
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(MEDIA_SERVE={'BACKEND': 'x-accel-redirect',
+                                    'ACCEL_PREFIX': '/protected/',
+                                    'MAX_AGE': 60})
+    def test_accel_redirect(self):
+        """Test nginx is told to send the file."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Accel-Redirect'],
+                         f'/protected/{self.recipe.image.name}')
+        self.assertEqual(response.content, b'')
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    @override_settings(MEDIA_SERVE={'BACKEND': 'x-sendfile',
+                                    'ACCEL_PREFIX': '', 'MAX_AGE': 60})
+    def test_sendfile(self):
+        """Test the web server is given the file's path."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Sendfile'], self.recipe.image.path)
+        self.assertEqual(response.content, b'')
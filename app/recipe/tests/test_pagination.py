@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.pagination import KeysetPagination
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def sample_recipe(user, title='Borscht'):
+    """Create and return a sample recipe."""
+    return Recipe.objects.create(user=user, title=title, time=5, price=25)
+
+
+class KeysetPaginationTests(TestCase):
+    """Test keyset pagination of the list endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+
+    def fetch_all(self, url, params):
+        """Follow next links from url and return every returned id."""
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [item['id'] for item in response.data['results']]
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_recipes_paginated_newest_first(self):
+        """Test paging through recipes returns each recipe once."""
+        recipes = [sample_recipe(self.user) for _ in range(7)]
+
+        ids = self.fetch_all(RECIPES_URL, {'page_size': 3})
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_tags_paginated_with_duplicate_names(self):
+        """Test tags sharing a name are neither skipped nor repeated."""
+        for name in ['Vegan', 'Spicy', 'Vegan', 'Vegan', 'Dessert', 'Spicy']:
+            Tag.objects.create(user=self.user, name=name)
+        expected = Tag.objects.order_by('-name', 'id') \
+                              .values_list('id', flat=True)
+
+        ids = self.fetch_all(TAGS_URL, {'page_size': 2})
+
+        self.assertEqual(ids, list(expected))
+
+    def test_page_size_capped(self):
+        """Test the page size can't exceed the maximum."""
+        max_page_size = KeysetPagination.max_page_size
+        Recipe.objects.bulk_create(
+            Recipe(user=self.user, title='Soup', time=5, price=2)
+            for _ in range(max_page_size + 1)
+        )
+
+        response = self.client.get(RECIPES_URL,
+                                   {'page_size': max_page_size * 2})
+
+        self.assertEqual(len(response.data['results']), max_page_size)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_unpaginated_opt_out(self):
+        """Test clients can still get the whole list at once."""
+        sample_recipe(self.user)
+        sample_recipe(self.user)
+
+        response = self.client.get(RECIPES_URL, {'paginate': 'false'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        response = self.client.get(RECIPES_URL, {'cursor': 'garbage'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
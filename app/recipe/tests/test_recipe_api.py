@@ -1,9 +1,13 @@
+import json
 import os
 import tempfile
+from unittest.mock import patch
 
 from PIL import Image
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
@@ -11,9 +15,12 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryCountMixin
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
 RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 # Helper functions
 
@@ -77,7 +84,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """Test that recipes received are limited to the auth'ed user."""
@@ -91,7 +98,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_view_recipe_detail(self):
         """Test viewing a recipe detail."""
@@ -196,6 +203,125 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(tags.count(), 0)
 
 
+class RecipeQueryCountTests(QueryCountMixin, TestCase):
+    """Test the recipe endpoints run a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@google.com', password='testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = sample_tag(user=self.user)
+        self.ingredient = sample_ingredient(user=self.user)
+
+    def add_recipes(self, count):
+        """Add recipes with a tag and an ingredient each."""
+        for _ in range(count):
+            recipe = sample_recipe(user=self.user)
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.ingredient)
+
+    def test_list_queries_constant(self):
+        """Test listing recipes doesn't run a query per recipe."""
+        self.assertConstantQueries(
+            self.add_recipes,
+            lambda: self.client.get(RECIPES_URL),
+        )
+
+    def test_detail_queries_constant(self):
+        """Test a recipe detail doesn't run a query per tag or ingredient."""
+        recipe = sample_recipe(user=self.user)
+
+        def add_relations(count):
+            for index in range(count):
+                recipe.tags.add(sample_tag(self.user, name=f'Tag {index}'))
+                recipe.ingredients.add(
+                    sample_ingredient(self.user, name=f'Ingredient {index}')
+                )
+
+        self.assertConstantQueries(
+            add_relations,
+            lambda: self.client.get(detail_url(recipe.id)),
+        )
+
+    def test_list_prefetched_ids(self):
+        """Test the prefetched list still returns every related id."""
+        self.add_recipes(2)
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for recipe in response.data['results']:
+            self.assertEqual(recipe['tags'], [self.tag.id])
+            self.assertEqual(recipe['ingredients'], [self.ingredient.id])
+
+
+class RecipeExportTests(TestCase):
+    """Test streaming the whole recipe book."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@google.com', password='testpass'
+        )
+        self.client.force_authenticate(self.user)
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        self.recipes = []
+        for index in range(5):
+            recipe = sample_recipe(user=self.user, title=f'Recipe {index}')
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+            self.recipes.append(recipe)
+        sample_recipe(
+            user=get_user_model().objects.create_user('other@google.com',
+                                                      'testpass')
+        )
+
+    def expected(self):
+        """Return the serialized recipes of the user, newest first."""
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        return RecipeDetailSerializer(recipes, many=True).data
+
+    def test_export_json(self):
+        """Test exporting recipes as a JSON array."""
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        content = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(content, json.loads(json.dumps(self.expected())))
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline-delimited JSON."""
+        response = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         json.loads(json.dumps(self.expected())))
+
+    def test_export_empty(self):
+        """Test exporting an empty recipe book returns an empty array."""
+        Recipe.objects.filter(user=self.user).delete()
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+    @patch.object(RecipeViewSet, 'export_chunk_size', 2)
+    def test_export_prefetches_per_chunk(self):
+        """Test relations are fetched once per chunk, not once per recipe."""
+        response = self.client.get(EXPORT_URL)
+        with CaptureQueriesContext(connection) as context:
+            b''.join(response.streaming_content)
+
+        chunks = 3
+        self.assertEqual(len(context.captured_queries), 1 + chunks * 2)
+
+
 class RecipeImageUploadTests(TestCase):
 
     def setUp(self):
@@ -218,8 +344,9 @@ class RecipeImageUploadTests(TestCase):
             response = self.client.post(url, {'image': file}, format='multipart')
 
         self.recipe.refresh_from_db()
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', response.data)
+        self.assertEqual(response.data['job']['status'], 'pending')
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
     def test_upload_image_bad_request(self):
@@ -247,9 +374,9 @@ class RecipeImageUploadTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, response.data)
-        self.assertIn(serializer2.data, response.data)
-        self.assertNotIn(serializer3.data, response.data)
+        self.assertIn(serializer1.data, response.data['results'])
+        self.assertIn(serializer2.data, response.data['results'])
+        self.assertNotIn(serializer3.data, response.data['results'])
 
     def test_recipe_filtering_by_ingredients(self):
         """Test returning recipes with certain ingredient tags."""
@@ -270,6 +397,62 @@ class RecipeImageUploadTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, response.data)
-        self.assertIn(serializer2.data, response.data)
-        self.assertNotIn(serializer3.data, response.data)
+        self.assertIn(serializer1.data, response.data['results'])
+        self.assertIn(serializer2.data, response.data['results'])
+        self.assertNotIn(serializer3.data, response.data['results'])
+
+    def test_filter_any_without_duplicates(self):
+        """Test a recipe matching several filter ids is returned once."""
+        recipe = sample_recipe(user=self.user)
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Dessert')
+        ingredient1 = sample_ingredient(user=self.user, name='Kale')
+        ingredient2 = sample_ingredient(user=self.user, name='Salt')
+        recipe.tags.add(tag1, tag2)
+        recipe.ingredients.add(ingredient1, ingredient2)
+
+        response = self.client.get(RECIPES_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'ingredients': f'{ingredient1.id},{ingredient2.id}',
+        })
+
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [recipe.id])
+
+    def test_filter_match_all(self):
+        """Test match=all returns recipes having every given ingredient."""
+        salt = sample_ingredient(user=self.user, name='Salt')
+        kale = sample_ingredient(user=self.user, name='Kale')
+        both = sample_recipe(user=self.user, title='Kale chips')
+        both.ingredients.add(salt, kale)
+        sample_recipe(user=self.user, title='Soup').ingredients.add(salt)
+
+        response = self.client.get(RECIPES_URL, {
+            'ingredients': f'{salt.id},{kale.id},{kale.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [both.id])
+
+    def test_filter_match_all_combined(self):
+        """Test match=all applies to tags and ingredients together."""
+        salt = sample_ingredient(user=self.user, name='Salt')
+        vegan = sample_tag(user=self.user, name='Vegan')
+        recipe1 = sample_recipe(user=self.user, title='Kale chips')
+        recipe1.ingredients.add(salt)
+        recipe1.tags.add(vegan)
+        sample_recipe(user=self.user, title='Soup').ingredients.add(salt)
+
+        response = self.client.get(RECIPES_URL, {
+            'ingredients': f'{salt.id}', 'tags': f'{vegan.id}', 'match': 'all',
+        })
+
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [recipe1.id])
+
+    def test_filter_invalid_match(self):
+        """Test an unknown match mode is rejected."""
+        response = self.client.get(RECIPES_URL, {'match': 'some'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,159 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from core.search import update_search_vectors
+
+RECIPES_URL = reverse('recipe:recipe-list')
+RECIPES_BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {'title': 'Borscht', 'time': 5, 'price': 25}
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchTests(TestCase):
+    """Test full-text search of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+
+    def search(self, term, **params):
+        """Return the titles of the recipes matching term."""
+        response = self.client.get(RECIPES_URL, {'search': term, **params})
+        return [recipe['title'] for recipe in response.data['results']]
+
+    def test_search_title(self):
+        """Test searching recipes by a word of their title."""
+        sample_recipe(self.user, title='Tomato soup')
+        sample_recipe(self.user, title='Apple pie')
+
+        self.assertEqual(self.search('soups'), ['Tomato soup'])
+
+    def test_search_tags_and_ingredients(self):
+        """Test recipes are found by their tag and ingredient names."""
+        recipe1 = sample_recipe(self.user, title='Borscht')
+        recipe2 = sample_recipe(self.user, title='Okroshka')
+        recipe1.tags.add(Tag.objects.create(user=self.user, name='Hot'))
+        recipe2.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Cucumber')
+        )
+
+        self.assertEqual(self.search('hot'), ['Borscht'])
+        self.assertEqual(self.search('cucumber'), ['Okroshka'])
+
+    def test_title_ranked_first(self):
+        """Test a title match ranks above a tag match."""
+        tagged = sample_recipe(self.user, title='Borscht')
+        tagged.tags.add(Tag.objects.create(user=self.user, name='Beetroot'))
+        sample_recipe(self.user, title='Beetroot salad')
+
+        self.assertEqual(self.search('beetroot'),
+                         ['Beetroot salad', 'Borscht'])
+
+    def test_search_paginates_by_rank(self):
+        """Test the cursor of a search continues in rank order."""
+        tag = Tag.objects.create(user=self.user, name='Beetroot')
+        for title in ('Borscht', 'Vinaigrette'):
+            sample_recipe(self.user, title=title).tags.add(tag)
+        sample_recipe(self.user, title='Beetroot salad')
+
+        first = self.client.get(RECIPES_URL, {'search': 'beetroot',
+                                              'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        titles = [recipe['title'] for recipe in
+                  first.data['results'] + second.data['results']]
+        self.assertEqual(titles, ['Beetroot salad', 'Vinaigrette', 'Borscht'])
+        self.assertIsNone(second.data['next'])
+
+    def test_index_follows_changes(self):
+        """Test renames and unassignments update the search results."""
+        recipe = sample_recipe(self.user, title='Borscht')
+        tag = Tag.objects.create(user=self.user, name='Hot')
+        recipe.tags.add(tag)
+
+        tag.name = 'Spicy'
+        tag.save()
+        self.assertEqual(self.search('spicy'), ['Borscht'])
+
+        recipe.tags.clear()
+        self.assertEqual(self.search('spicy'), [])
+
+        recipe.tags.add(tag)
+        tag.delete()
+        self.assertEqual(self.search('spicy'), [])
+
+        recipe.title = 'Pelmeni'
+        recipe.save()
+        self.assertEqual(self.search('pelmeni'), ['Pelmeni'])
+
+    def test_reverse_relation_changes(self):
+        """Test assigning recipes from the tag side updates them."""
+        recipe = sample_recipe(self.user, title='Borscht')
+        tag = Tag.objects.create(user=self.user, name='Hot')
+
+        tag.recipe_set.add(recipe)
+        self.assertEqual(self.search('hot'), ['Borscht'])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self.search('hot'), [])
+
+    def test_bulk_created_recipes_indexed(self):
+        """Test recipes created in bulk are searchable."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [
+            {'title': 'Salad', 'time': 5, 'price': '5.00', 'tags': [tag.id],
+             'ingredients': []},
+            {'title': 'Stew', 'time': 5, 'price': '5.00', 'tags': [],
+             'ingredients': []},
+        ]
+        self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(self.search('vegan'), ['Salad'])
+
+    def test_bulk_updated_recipes_indexed_once(self):
+        """Test a bulk update recomputes the search vectors in one go."""
+        recipes = [sample_recipe(self.user, title=title)
+                   for title in ('Salad', 'Stew')]
+        payload = [{'id': recipe.id, 'title': f'Vegan {recipe.title}'}
+                   for recipe in recipes]
+
+        with patch('core.signals.update_search_vectors',
+                   wraps=update_search_vectors) as update:
+            self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(update.call_count, 1)
+        self.assertEqual(sorted(self.search('vegan')),
+                         ['Vegan Salad', 'Vegan Stew'])
+
+    def test_search_limited_to_user(self):
+        """Test other users' recipes are never found."""
+        user2 = get_user_model().objects.create_user('other@google.com',
+                                                     'testpass')
+        sample_recipe(user2, title='Tomato soup')
+
+        self.assertEqual(self.search('soup'), [])
+
+    @patch('core.search.is_supported', return_value=False)
+    def test_substring_fallback(self, is_supported):
+        """Test databases without full-text search match substrings."""
+        recipe = sample_recipe(self.user, title='Tomato soup')
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Basil')
+        )
+        sample_recipe(self.user, title='Apple pie')
+
+        self.assertEqual(self.search('SOUP'), ['Tomato soup'])
+        self.assertEqual(self.search('basil'), ['Tomato soup'])
@@ -6,6 +6,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Tag, Recipe
+from core.tests.utils import QueryCountMixin
 from recipe.serializers import TagSerializer
 
 TAGS_URL = reverse('recipe:tag-list')
@@ -23,7 +24,7 @@ class PublicTagsApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateTagsApiTests(TestCase):
+class PrivateTagsApiTests(QueryCountMixin, TestCase):
     """Test the authorized user tags API."""
 
     def setUp(self):
@@ -42,7 +43,7 @@ class PrivateTagsApiTests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test that the tags received are for the authenticated user only."""
@@ -54,8 +55,8 @@ class PrivateTagsApiTests(TestCase):
         response = self.client.get(TAGS_URL)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], tag.name)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successful(self):
         """Test creating a new tag."""
@@ -87,5 +88,49 @@ class PrivateTagsApiTests(TestCase):
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
 
-        self.assertNotIn(serializer1.data, response.data)
-        self.assertIn(serializer2.data, response.data)
+        self.assertNotIn(serializer1.data, response.data['results'])
+        self.assertIn(serializer2.data, response.data['results'])
+
+    def test_retrieve_tags_assigned_unique(self):
+        """Test a tag used by many recipes is returned once."""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Lunch')
+        for _ in range(5):
+            recipe = Recipe.objects.create(title='Porridge', time=5,
+                                           price=3, user=self.user)
+            recipe.tags.add(tag)
+
+        response = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(response.data['results'],
+                         [TagSerializer(tag).data])
+
+    def test_retrieve_tags_with_counts(self):
+        """Test tags can be listed with the number of recipes using them."""
+        popular = Tag.objects.create(user=self.user, name='Breakfast')
+        unused = Tag.objects.create(user=self.user, name='Lunch')
+        for _ in range(3):
+            recipe = Recipe.objects.create(title='Porridge', time=5,
+                                           price=3, user=self.user)
+            recipe.tags.add(popular)
+
+        response = self.client.get(TAGS_URL, {'counts': 1})
+
+        counts = {tag['id']: tag['recipe_count']
+                  for tag in response.data['results']}
+        self.assertEqual(counts, {popular.id: 3, unused.id: 0})
+
+    def test_tag_counts_queries_constant(self):
+        """Test counting recipes doesn't run a query per tag or recipe."""
+        def add_tags(count):
+            for index in range(count):
+                tag = Tag.objects.create(user=self.user, name=f'Tag {index}')
+                recipe = Recipe.objects.create(title='Porridge', time=5,
+                                               price=3, user=self.user)
+                recipe.tags.add(tag)
+
+        self.assertConstantQueries(
+            add_tags,
+            lambda: self.client.get(TAGS_URL, {'counts': 1,
+                                               'assigned_only': 1}),
+        )
@@ -0,0 +1,148 @@
+import io
+import os
+import struct
+import zlib
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.tests.utils import MediaRootMixin
+
+LIMITS = {
+    'MAX_BYTES': 20000,
+    'MAX_PIXELS': 1000 * 1000,
+    'MAX_HEADER_BYTES': 1024,
+    'FORMATS': ('JPEG', 'PNG'),
+}
+
+
+def image_upload_url(recipe_id):
+    """Return URL for recipe image upload."""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def png_chunk(kind, data):
+    """Return a PNG chunk with its length and checksum."""
+    return struct.pack('>I', len(data)) + kind + data + \
+        struct.pack('>I', zlib.crc32(kind + data))
+
+
+def png_header(width, height):
+    """Return a tiny PNG claiming the given dimensions."""
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', ihdr) + \
+        png_chunk(b'IDAT', zlib.compress(b'\x00' * 64)) + \
+        png_chunk(b'IEND', b'')
+
+
+def upload_file(content, name='photo.png'):
+    file = io.BytesIO(content)
+    file.name = name
+    return file
+
+
+def noise_image(size, format='PNG'):
+    """Return an incompressible image of the given size."""
+    file = io.BytesIO()
+    Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3)) \
+         .save(file, format=format)
+    return file.getvalue()
+
+
+@override_settings(IMAGE_UPLOAD=LIMITS)
+class BoundedUploadTests(MediaRootMixin, TestCase):
+    """Test image uploads are bounded while they stream in."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@google.com',
+                                                         'testpass')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Borscht',
+                                            time=5, price=25)
+
+    def upload(self, content, name='photo.png'):
+        return self.client.post(image_upload_url(self.recipe.id),
+                                {'image': upload_file(content, name)},
+                                format='multipart')
+
+    def assertRejected(self, response, status_code):
+        self.assertEqual(response.status_code, status_code)
+        self.assertEqual(self.stored_files(), [])
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_valid_image_saved(self):
+        """Test an image within the limits is stored without leftovers."""
+        response = self.upload(noise_image((20, 20)))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.stored_files(), [self.recipe.image.name])
+
+    def test_identical_uploads_share_file(self):
+        """Test uploading the same image to two recipes stores it once."""
+        content = noise_image((20, 20))
+        other = Recipe.objects.create(user=self.user, title='Okroshka',
+                                      time=5, price=25)
+        self.upload(content)
+        self.client.post(image_upload_url(other.id),
+                         {'image': upload_file(content)}, format='multipart')
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+        self.assertEqual(self.stored_files(), [self.recipe.image.name])
+
+    def test_announced_size_rejected(self):
+        """Test a request larger than the limit is rejected unread."""
+        response = self.upload(noise_image((200, 200)))
+
+        self.assertRejected(response,
+                            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_streamed_size_rejected(self):
+        """Test the byte limit is enforced while the file streams in."""
+        content = noise_image((90, 90))
+        self.assertGreater(len(content), LIMITS['MAX_BYTES'])
+
+        response = self.upload(content)
+
+        self.assertRejected(response,
+                            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_too_many_pixels_rejected(self):
+        """Test dimensions over the pixel limit are rejected."""
+        response = self.upload(png_header(2000, 2000))
+
+        self.assertRejected(response, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', response.data['image'][0])
+
+    def test_decompression_bomb_rejected(self):
+        """Test a tiny file claiming enormous dimensions is rejected."""
+        content = png_header(100000, 100000)
+        self.assertLess(len(content), 200)
+
+        response = self.upload(content)
+
+        self.assertRejected(response, status.HTTP_400_BAD_REQUEST)
+
+    def test_unsupported_format_rejected(self):
+        """Test formats outside the allowed list are rejected."""
+        response = self.upload(noise_image((20, 20), 'BMP'), 'photo.bmp')
+
+        self.assertRejected(response, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_an_image_rejected(self):
+        """Test uploads without an image header are rejected."""
+        response = self.upload(os.urandom(4000), 'photo.jpg')
+
+        self.assertRejected(response, status.HTTP_400_BAD_REQUEST)
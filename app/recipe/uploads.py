@@ -0,0 +1,144 @@
+import hashlib
+import io
+import os
+import uuid
+import warnings
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from core.models import Recipe
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Upload too large.'
+    default_code = 'too_large'
+
+
+class StreamedUploadedFile(UploadedFile):
+    """A file written by BoundedImageUploadHandler into media storage.
+
+    Like a TemporaryUploadedFile it exposes temporary_file_path(), so the
+    storage moves it into place instead of copying it, and it is deleted
+    on close if it was never saved. `sha256` is the hex digest of the
+    content, computed while it streamed in.
+    """
+
+    def __init__(self, path, name, content_type, size, charset,
+                 content_type_extra, sha256):
+        super().__init__(open(path, 'rb'), name, content_type, size,
+                         charset, content_type_extra)
+        self.path = path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        try:
+            return self.file.close()
+        finally:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class BoundedImageUploadHandler(FileUploadHandler):
+    """Stream an image upload to disk, rejecting it as soon as it's too big.
+
+    The request size is checked before anything is read, the byte count
+    while chunks arrive and the pixel dimensions as soon as the image
+    header is in. Pixels are never decoded. Chunks go to a file next to
+    the final upload location, so saving the image is a rename.
+    """
+    upload_to = 'uploads/recipe'
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        options = settings.IMAGE_UPLOAD
+        self.max_bytes = options['MAX_BYTES']
+        self.max_pixels = options['MAX_PIXELS']
+        self.max_header_bytes = options['MAX_HEADER_BYTES']
+        self.formats = options['FORMATS']
+        self.file = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """Refuse requests that announce more bytes than allowed."""
+        if content_length > self.max_bytes + self.chunk_size:
+            raise UploadTooLarge(self.size_message())
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        storage = Recipe._meta.get_field('image').storage
+        self.path = storage.path(
+            os.path.join(self.upload_to, f'{uuid.uuid4().hex}.part')
+        )
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, 'wb')
+        self.hash = hashlib.sha256()
+        self.header = b''
+        self.size_checked = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_bytes:
+            self.abort(UploadTooLarge(self.size_message()))
+        if not self.size_checked:
+            self.check_header(raw_data)
+        self.file.write(raw_data)
+        self.hash.update(raw_data)
+
+    def check_header(self, raw_data):
+        """Check the image's format and dimensions from its first bytes."""
+        self.header += raw_data
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            try:
+                image = Image.open(io.BytesIO(self.header))
+            except Image.DecompressionBombError:
+                self.abort(self.invalid(self.pixels_message()))
+            except (OSError, SyntaxError):
+                if len(self.header) >= self.max_header_bytes:
+                    self.abort(self.invalid('Upload a valid image.'))
+                return
+        if image.format not in self.formats:
+            self.abort(self.invalid(
+                f'Unsupported image format {image.format}.'
+            ))
+        width, height = image.size
+        if width * height > self.max_pixels:
+            self.abort(self.invalid(self.pixels_message()))
+        self.size_checked = True
+        self.header = b''
+
+    def file_complete(self, file_size):
+        self.file.close()
+        if not self.size_checked:
+            self.abort(self.invalid('Upload a valid image.'))
+        return StreamedUploadedFile(self.path, self.file_name,
+                                    self.content_type, file_size,
+                                    self.charset, self.content_type_extra,
+                                    self.hash.hexdigest())
+
+    def abort(self, error):
+        """Delete the partial file and fail the request with error."""
+        self.file.close()
+        os.remove(self.path)
+        raise error
+
+    def invalid(self, message):
+        return ValidationError({'image': [message]})
+
+    def size_message(self):
+        return f'Images may be at most {self.max_bytes} bytes.'
+
+    def pixels_message(self):
+        return f'Images may have at most {self.max_pixels} pixels.'
@@ -1,76 +1,200 @@
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
+
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.mixins import ListModelMixin, CreateModelMixin
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework import status
 
-from core.models import Tag, Ingredient, Recipe
+from core.authentication import CachedTokenAuthentication
+from core.db.routers import ReplicaReadMixin
+from core.models import Tag, Ingredient, Recipe, ImageJob
+from core.search import search_recipes
+from .cache import ListCacheMixin
+from .export import iter_chunks, stream_json_array, stream_ndjson
+from .images import enqueue
+from .mixins import BulkModelMixin, ConditionalGetMixin
+from .pagination import KeysetPagination
+from .renderers import NDJSONRenderer
 from .serializers import RecipeSerializer, IngredientSerializer, TagSerializer, \
-                         RecipeDetailSerializer, RecipeImageSerializer
+                         RecipeDetailSerializer, RecipeImageSerializer, \
+                         TagCountSerializer, IngredientCountSerializer, \
+                         RecipeImageStatusSerializer
+from .uploads import BoundedImageUploadHandler
 
 
-class BaseAttrViewSet(GenericViewSet, ListModelMixin, CreateModelMixin):
+class BaseAttrViewSet(ReplicaReadMixin, ConditionalGetMixin, ListCacheMixin,
+                      GenericViewSet, ListModelMixin, CreateModelMixin,
+                      BulkModelMixin):
     """Base attribute view set. """
-    authentication_classes = TokenAuthentication,
+    authentication_classes = CachedTokenAuthentication,
     permission_classes = IsAuthenticated,
+    pagination_class = KeysetPagination
+    keyset_ordering = '-name', 'id'
 
     def perform_create(self, serializer):
         """Create a new object."""
         serializer.save(user=self.request.user)
 
+    def _with_counts(self):
+        """Return True if the client asked for recipe counts."""
+        return self.action == 'list' and \
+            bool(self.request.query_params.get('counts'))
+
+    def _recipe_links(self):
+        """Return the through rows linking recipes to the outer object."""
+        field = Recipe._meta.get_field(self.recipe_field)
+        return field.remote_field.through.objects.filter(
+            **{field.m2m_reverse_field_name(): OuterRef('pk')}
+        )
+
     def get_queryset(self):
         """Return objects for the authenticated user."""
         assigned_only = bool(self.request.query_params.get('assigned_only'))
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            assigned = Exists(self._recipe_links())
+            queryset = queryset.annotate(assigned=assigned) \
+                               .filter(assigned=True)
+        if self._with_counts():
+            queryset = queryset.annotate(recipe_count=Count('recipe'))
         return queryset.filter(user=self.request.user) \
-                       .order_by('-name')
+                       .order_by(*self.keyset_ordering)
+
+    def get_serializer_class(self):
+        """Return the serializer with recipe counts when they're asked for."""
+        if self._with_counts():
+            return self.count_serializer_class
+        return self.serializer_class
 
 
 class TagViewSet(BaseAttrViewSet):
     """The ViewSet for Tags."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    count_serializer_class = TagCountSerializer
+    recipe_field = 'tags'
         
 
 class IngredientViewSet(BaseAttrViewSet):
     """The ViewSet for Ingredients."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    count_serializer_class = IngredientCountSerializer
+    recipe_field = 'ingredients'
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, ConditionalGetMixin, ListCacheMixin,
+                    ModelViewSet, BulkModelMixin):
     """Manage recipes in the db."""
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = TokenAuthentication,
+    authentication_classes = CachedTokenAuthentication,
     permission_classes = IsAuthenticated,
+    pagination_class = KeysetPagination
+    throttle_scope = None
+    keyset_ordering = '-id',
+    search_ordering = '-rank', '-id'
+    match_modes = 'any', 'all'
+    export_chunk_size = 500
 
     def _params_to_ints(self, qs):
         """ List of str -> list of int."""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _match_mode(self):
+        """Return 'any' or 'all', how recipes must match the id filters."""
+        match = self.request.query_params.get('match', 'any')
+        if match not in self.match_modes:
+            raise ValidationError(
+                {'match': [f'Must be one of: {", ".join(self.match_modes)}.']}
+            )
+        return match
+
+    def _filter_related(self, queryset, field_name, ids, match):
+        """Keep recipes related to any or all of `ids` through field_name.
+
+        Both modes query the through table in a subquery, so recipes are
+        never duplicated however many ids or relations are filtered on.
+        """
+        field = Recipe._meta.get_field(field_name)
+        links = field.remote_field.through.objects.filter(
+            **{f'{field.m2m_reverse_field_name()}_id__in': ids}
+        )
+        recipe = f'{field.m2m_field_name()}_id'
+        if match == 'all':
+            target = f'{field.m2m_reverse_field_name()}_id'
+            return queryset.filter(pk__in=links.values(recipe)
+                                   .annotate(matched=Count(target,
+                                                           distinct=True))
+                                   .filter(matched=len(set(ids)))
+                                   .values(recipe))
+        related = Exists(links.filter(**{recipe: OuterRef('pk')}))
+        return queryset.annotate(**{f'has_{field_name}': related}) \
+                       .filter(**{f'has_{field_name}': True})
+
+    def _with_related(self, queryset):
+        """Prefetch the relations the current action's serializer renders."""
+        if self.action == 'retrieve':
+            return queryset.prefetch_related('ingredients', 'tags')
+        if self.action == 'image':
+            return queryset.prefetch_related('renditions')
+        if self.action == 'list':
+            return queryset.prefetch_related(
+                Prefetch('ingredients',
+                         queryset=Ingredient.objects.only('id')),
+                Prefetch('tags', queryset=Tag.objects.only('id')),
+            )
+        return queryset
+
+    def _search_term(self):
+        """Return the full-text search term of a list request, if any."""
+        if self.action in ('list', 'export'):
+            return self.request.query_params.get('search', '').strip()
+        return ''
+
+    def get_keyset_ordering(self):
+        """Order search results by relevance, everything else by id."""
+        if self._search_term():
+            return self.search_ordering
+        return self.keyset_ordering
+
     def get_queryset(self):
         """Retrieve the recipes for the authenticated used."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        search = self._search_term()
+        match = self._match_mode()
+        queryset = self.queryset
+        if search:
+            queryset = search_recipes(queryset, search)
         if tags:
             tag_ids = self._params_to_ints(tags)
-            self.queryset = self.queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_related(queryset, 'tags', tag_ids, match)
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            self.queryset = self.queryset.filter(ingredients__id__in=ingredient_ids)
-        return self.queryset.filter(user=self.request.user)
+            queryset = self._filter_related(queryset, 'ingredients',
+                                            ingredient_ids, match)
+        queryset = queryset.filter(user=self.request.user) \
+                           .order_by(*self.get_keyset_ordering())
+        return self._with_related(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
 
     def get_serializer_class(self):
         """Return appropriate serializer class."""
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'export'):
             return RecipeDetailSerializer
         elif self.action == 'upload_image':
             return RecipeImageSerializer
+        elif self.action == 'image':
+            return RecipeImageStatusSerializer
         
         return self.serializer_class
     
@@ -78,23 +202,47 @@ class RecipeViewSet(ModelViewSet):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @action(methods=['POST'], detail=True, url_path='upload-image',
+            throttle_scope='upload')
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe."""
         recipe = self.get_object()
+        request.upload_handlers = [BoundedImageUploadHandler(request)]
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                enqueue(ImageJob.objects.create(recipe=recipe,
+                                                source=recipe.image.name))
             return Response(
-                serializer.data,
-                status=status.HTTP_200_OK,
+                RecipeImageStatusSerializer(
+                    recipe, context=self.get_serializer_context()
+                ).data,
+                status=status.HTTP_202_ACCEPTED,
             )
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
 
-
+    @action(methods=['GET'], detail=True)
+    def image(self, request, pk=None):
+        """Return the processing status and renditions of the image."""
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
+
+    @action(methods=['GET'], detail=False,
+            renderer_classes=[JSONRenderer, NDJSONRenderer])
+    def export(self, request):
+        """Stream every recipe of the user as JSON or NDJSON."""
+        chunks = iter_chunks(self.get_queryset(), self.export_chunk_size,
+                             'ingredients', 'tags')
+        renderer = request.accepted_renderer
+        if renderer.format == NDJSONRenderer.format:
+            content = stream_ndjson(chunks, self.get_serializer_class())
+        else:
+            content = stream_json_array(chunks, self.get_serializer_class())
+        return StreamingHttpResponse(content, content_type=renderer.media_type)
@@ -26,13 +26,10 @@ class UserSerializer(ModelSerializer):
     def update(self, instance, validated_data):
         """Update a user, setting the password correctly and return it."""
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
-
         if password:
-            user.set_password(password)
-            user.save()
-        
-        return user
+            instance.set_password(password)
+
+        return super().update(instance, validated_data)
     
 
 class AuthTokenSerializer(Serializer):
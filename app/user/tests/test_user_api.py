@@ -3,8 +3,11 @@ from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from core.authentication import get_token_store
+
 CREATE_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
@@ -59,6 +62,17 @@ class PublicUserAPITests(TestCase):
         self.assertIn('token', response.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_create_token_reuses_token(self):
+        """Test logging in again returns the same, cached token."""
+        payload = {'email': 'test@google.com', 'password': 'testpass'}
+        create_user(**payload)
+        first = self.client.post(TOKEN_URL, payload)
+        second = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(first.data['token'], second.data['token'])
+        self.assertEqual(Token.objects.count(), 1)
+        self.assertIsNotNone(get_token_store().get(second.data['token']))
+
     def test_create_token_invalid_credentials(self):
         """Test that token is not created if invalid credentials are given."""
         create_user(email='test@google.com', password='rightpass')
@@ -1,23 +1,45 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
+from core.authentication import CachedTokenAuthentication, get_token_store
+from core.db.routers import ReplicaReadMixin
+from core.throttling import AuthThrottle
 from .serializers import UserSerializer, AuthTokenSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
+    throttle_classes = AuthThrottle,
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
+    throttle_classes = AuthThrottle,
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+    def post(self, request, *args, **kwargs):
+        """Return the user's token, creating it on the first login.
+
+        The token is also cached for CachedTokenAuthentication, so the
+        client's next request doesn't have to look it up.
+        """
+        serializer = self.serializer_class(data=request.data,
+                                           context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        token, _ = Token.objects.get_or_create(user=user)
+        token.user = user
+        get_token_store().set(token.key, token)
+        return Response({'token': token.key})
+
+class ManageUserView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = authentication.TokenAuthentication,
+    authentication_classes = CachedTokenAuthentication,
     permission_classes = permissions.IsAuthenticated,
 
     def get_object(self):